@@ -0,0 +1,133 @@
+"""Initial schema, as previously created by Base.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "openers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("context", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_openers_id", "openers", ["id"])
+
+    op.create_table(
+        "continue_options",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("weight", sa.Float(), nullable=False),
+        sa.Column("opener_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["opener_id"], ["openers.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_continue_options_id", "continue_options", ["id"])
+
+    op.create_table(
+        "stories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_stories_id", "stories", ["id"])
+
+    op.create_table(
+        "formats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_formats_id", "formats", ["id"])
+
+    op.create_table(
+        "story_formats",
+        sa.Column("story_id", sa.Integer(), nullable=False),
+        sa.Column("format_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["format_id"], ["formats.id"]),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("story_id", "format_id"),
+    )
+
+    op.create_table(
+        "languages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("code", sa.String(length=2), nullable=False),
+        sa.Column("story_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_languages_id", "languages", ["id"])
+
+    op.create_table(
+        "contents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("language_id", sa.Integer(), nullable=False),
+        sa.Column("format_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["format_id"], ["formats.id"]),
+        sa.ForeignKeyConstraint(["language_id"], ["languages.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_contents_id", "contents", ["id"])
+
+    op.create_table(
+        "profiles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("age", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("telegram_tag", sa.String(), nullable=True),
+        sa.Column("birth_date", sa.Date(), nullable=True),
+        sa.Column("photo", sa.String(), nullable=True),
+        sa.Column("opener_id", sa.Integer(), nullable=True),
+        sa.Column("story_id", sa.Integer(), nullable=True),
+        sa.Column("answered_opener", sa.Boolean(), nullable=True),
+        sa.Column("story_discussed", sa.Boolean(), nullable=True),
+        sa.Column("closed_for_meet", sa.Boolean(), nullable=True),
+        sa.Column("closed_for_sex", sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(["opener_id"], ["openers.id"]),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_profiles_id", "profiles", ["id"])
+
+    op.create_table(
+        "hobbies",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("profile_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["profile_id"], ["profiles.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_hobbies_id", "hobbies", ["id"])
+
+    op.create_table(
+        "notes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("profile_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["profile_id"], ["profiles.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_notes_id", "notes", ["id"])
+
+
+def downgrade():
+    for table in (
+        "notes", "hobbies", "profiles", "contents", "languages",
+        "story_formats", "formats", "stories", "continue_options", "openers",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,153 @@
+"""Story version column and full-text search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# The search DDL as of this revision; kept here rather than imported from the
+# app so replaying the migration always builds the same schema.
+
+# Language.code -> PostgreSQL text search configuration; anything else uses 'simple'
+TEXT_SEARCH_CONFIGS = {
+    "da": "danish",
+    "de": "german",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "hu": "hungarian",
+    "it": "italian",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+
+def _postgres_config_function() -> str:
+    cases = " ".join(f"WHEN '{code}' THEN '{config}'" for code, config in TEXT_SEARCH_CONFIGS.items())
+    return f"""
+        CREATE OR REPLACE FUNCTION story_search_config(code text) RETURNS regconfig AS $$
+            SELECT (CASE lower(code) {cases} ELSE 'simple' END)::regconfig
+        $$ LANGUAGE sql IMMUTABLE
+    """
+
+# contents.search_vector is maintained by a trigger: the language-specific
+# (stemmed) vector plus a 'simple' one so searches without a language still match.
+# Only text contents are indexed; audio rows hold a file path.
+POSTGRES_DDL = [
+    _postgres_config_function(),
+    "ALTER TABLE contents ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION contents_search_vector_update() RETURNS trigger AS $$
+    DECLARE
+        config regconfig;
+        format_type text;
+    BEGIN
+        SELECT story_search_config(code) INTO config FROM languages WHERE id = NEW.language_id;
+        SELECT type INTO format_type FROM formats WHERE id = NEW.format_id;
+        IF format_type = 'text' THEN
+            NEW.search_vector := to_tsvector(config, NEW.content) || to_tsvector('simple', NEW.content);
+        ELSE
+            NEW.search_vector := NULL;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS contents_search_vector ON contents",
+    """
+    CREATE TRIGGER contents_search_vector
+    BEFORE INSERT OR UPDATE OF content, language_id, format_id ON contents
+    FOR EACH ROW EXECUTE FUNCTION contents_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_contents_search_vector ON contents USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_stories_title_search ON stories USING gin (to_tsvector('simple', title))",
+    # Backfill rows written before the trigger existed
+    "UPDATE contents SET content = content WHERE search_vector IS NULL",
+]
+
+# SQLite fallback for local runs and tests: FTS5 tables keyed by rowid = row id
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contents_fts USING fts5(body, tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER IF NOT EXISTS contents_fts_insert AFTER INSERT ON contents BEGIN
+        INSERT INTO contents_fts(rowid, body) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contents_fts_delete AFTER DELETE ON contents BEGIN
+        DELETE FROM contents_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contents_fts_update AFTER UPDATE OF content ON contents BEGIN
+        UPDATE contents_fts SET body = new.content WHERE rowid = old.id;
+    END
+    """,
+    "CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(title, tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER IF NOT EXISTS stories_fts_insert AFTER INSERT ON stories BEGIN
+        INSERT INTO stories_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stories_fts_delete AFTER DELETE ON stories BEGIN
+        DELETE FROM stories_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stories_fts_update AFTER UPDATE OF title ON stories BEGIN
+        UPDATE stories_fts SET title = new.title WHERE rowid = old.id;
+    END
+    """,
+    "INSERT INTO contents_fts(rowid, body) SELECT id, content FROM contents WHERE id NOT IN (SELECT rowid FROM contents_fts)",
+    "INSERT INTO stories_fts(rowid, title) SELECT id, title FROM stories WHERE id NOT IN (SELECT rowid FROM stories_fts)",
+]
+
+
+def upgrade():
+    # Databases created by create_all after the column was added already have it
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("stories")}
+    if "version" not in columns:
+        op.add_column(
+            "stories",
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+    bind = op.get_bind()
+    for statement in {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}.get(bind.dialect.name, []):
+        bind.exec_driver_sql(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS contents_search_vector ON contents")
+        op.execute("DROP FUNCTION IF EXISTS contents_search_vector_update()")
+        op.execute("DROP INDEX IF EXISTS ix_stories_title_search")
+        op.execute("DROP INDEX IF EXISTS ix_contents_search_vector")
+        op.execute("ALTER TABLE contents DROP COLUMN IF EXISTS search_vector")
+        op.execute("DROP FUNCTION IF EXISTS story_search_config(text)")
+    elif bind.dialect.name == "sqlite":
+        for trigger in (
+            "contents_fts_insert", "contents_fts_delete", "contents_fts_update",
+            "stories_fts_insert", "stories_fts_delete", "stories_fts_update",
+        ):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS contents_fts")
+        op.execute("DROP TABLE IF EXISTS stories_fts")
+
+    with op.batch_alter_table("stories") as batch:
+        batch.drop_column("version")
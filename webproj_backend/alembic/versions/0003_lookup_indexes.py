@@ -0,0 +1,79 @@
+"""Foreign-key and lookup indexes, unique formats/languages/contents
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+CANONICAL_FORMATS = "SELECT min(id) FROM formats GROUP BY type"
+CANONICAL_LANGUAGES = "SELECT min(id) FROM languages GROUP BY story_id, code"
+
+# Nothing enforced uniqueness before, so concurrent get-or-create calls may have
+# left duplicates. Fold them into the lowest id before the unique indexes go on.
+DEDUPLICATE = [
+    f"""
+    UPDATE contents SET format_id = (
+        SELECT min(f2.id) FROM formats f1 JOIN formats f2 ON f2.type = f1.type
+        WHERE f1.id = contents.format_id
+    )
+    WHERE format_id NOT IN ({CANONICAL_FORMATS})
+    """,
+    f"""
+    INSERT INTO story_formats (story_id, format_id)
+    SELECT DISTINCT sf.story_id, (
+        SELECT min(f2.id) FROM formats f1 JOIN formats f2 ON f2.type = f1.type
+        WHERE f1.id = sf.format_id
+    )
+    FROM story_formats sf
+    WHERE sf.format_id NOT IN ({CANONICAL_FORMATS})
+      AND NOT EXISTS (
+        SELECT 1 FROM story_formats existing
+        JOIN formats f ON f.id = existing.format_id
+        WHERE existing.story_id = sf.story_id
+          AND existing.format_id IN ({CANONICAL_FORMATS})
+          AND f.type = (SELECT type FROM formats WHERE id = sf.format_id)
+      )
+    """,
+    f"DELETE FROM story_formats WHERE format_id NOT IN ({CANONICAL_FORMATS})",
+    f"DELETE FROM formats WHERE id NOT IN ({CANONICAL_FORMATS})",
+    f"""
+    UPDATE contents SET language_id = (
+        SELECT min(l2.id) FROM languages l1
+        JOIN languages l2 ON l2.story_id = l1.story_id AND l2.code = l1.code
+        WHERE l1.id = contents.language_id
+    )
+    WHERE language_id NOT IN ({CANONICAL_LANGUAGES})
+    """,
+    f"DELETE FROM languages WHERE id NOT IN ({CANONICAL_LANGUAGES})",
+    "DELETE FROM contents WHERE id NOT IN (SELECT min(id) FROM contents GROUP BY language_id, format_id)",
+]
+
+
+def upgrade():
+    for statement in DEDUPLICATE:
+        op.execute(statement)
+
+    op.create_index("ix_hobbies_profile_id", "hobbies", ["profile_id"])
+    op.create_index("ix_notes_profile_id", "notes", ["profile_id"])
+    op.create_index("ix_continue_options_opener_id", "continue_options", ["opener_id"])
+    op.create_index("ix_formats_type", "formats", ["type"], unique=True)
+    op.create_index("uq_languages_story_id_code", "languages", ["story_id", "code"], unique=True)
+    op.create_index(
+        "uq_contents_language_id_format_id", "contents", ["language_id", "format_id"], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index("uq_contents_language_id_format_id", table_name="contents")
+    op.drop_index("uq_languages_story_id_code", table_name="languages")
+    op.drop_index("ix_formats_type", table_name="formats")
+    op.drop_index("ix_continue_options_opener_id", table_name="continue_options")
+    op.drop_index("ix_notes_profile_id", table_name="notes")
+    op.drop_index("ix_hobbies_profile_id", table_name="hobbies")
@@ -0,0 +1,161 @@
+"""Profile funnel summary table, maintained by triggers on profiles
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from typing import List
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# The trigger DDL as of this revision; kept here rather than imported from the
+# app so replaying the migration always builds the same schema.
+
+# Profile checkpoints in funnel order. Stage counts are cumulative: a profile
+# counts towards a stage only if it also reached every earlier one.
+FUNNEL_STAGES = ("answered_opener", "story_discussed", "closed_for_meet", "closed_for_sex")
+
+# profile_funnel keys use 0 for "no opener"/"no story" so they can be part of the primary key
+FUNNEL_KEYS = ("source", "opener_id", "story_id")
+FUNNEL_COLUMNS = FUNNEL_KEYS + ("total",) + FUNNEL_STAGES
+
+def _row_values(row: str, sign: str = "") -> List[str]:
+    keys = [f"{row}.source", f"coalesce({row}.opener_id, 0)", f"coalesce({row}.story_id, 0)"]
+    stages = [
+        f"{sign}(CASE WHEN " + " AND ".join(f"{row}.{name}" for name in FUNNEL_STAGES[:i + 1]) + " THEN 1 ELSE 0 END)"
+        for i in range(len(FUNNEL_STAGES))
+    ]
+    return keys + [f"{sign}1"] + stages
+
+UPSERT_COUNTS = (
+    f"ON CONFLICT ({', '.join(FUNNEL_KEYS)}) DO UPDATE SET "
+    + ", ".join(f"{name} = profile_funnel.{name} + excluded.{name}" for name in ("total",) + FUNNEL_STAGES)
+)
+
+def _upsert_row(row: str, sign: str = "") -> str:
+    return (
+        f"INSERT INTO profile_funnel ({', '.join(FUNNEL_COLUMNS)}) "
+        f"VALUES ({', '.join(_row_values(row, sign))}) {UPSERT_COUNTS};"
+    )
+
+def _upsert_changes(*selects: str) -> str:
+    # Net change per key across all rows of a statement, so bulk writes cost one upsert per group
+    sums = ", ".join(f"sum({name})" for name in ("total",) + FUNNEL_STAGES)
+    changed = " OR ".join(f"sum({name}) <> 0" for name in ("total",) + FUNNEL_STAGES)
+    return (
+        f"INSERT INTO profile_funnel ({', '.join(FUNNEL_COLUMNS)}) "
+        f"SELECT {', '.join(FUNNEL_KEYS)}, {sums} FROM ({' UNION ALL '.join(selects)}) changes "
+        f"GROUP BY {', '.join(FUNNEL_KEYS)} HAVING {changed} {UPSERT_COUNTS};"
+    )
+
+def _select_rows(table: str, sign: str = "") -> str:
+    values = _row_values("r", sign)
+    return "SELECT " + ", ".join(f"{value} AS {name}" for value, name in zip(values, FUNNEL_COLUMNS)) + f" FROM {table} r"
+
+REBUILD = [
+    "DELETE FROM profile_funnel",
+    f"""
+    INSERT INTO profile_funnel ({', '.join(FUNNEL_COLUMNS)})
+    SELECT {', '.join(FUNNEL_KEYS)}, {', '.join(f'sum({name})' for name in ('total',) + FUNNEL_STAGES)}
+    FROM ({_select_rows('profiles')}) profile_rows
+    GROUP BY {', '.join(FUNNEL_KEYS)}
+    """,
+]
+
+# Statement-level triggers with transition tables (PostgreSQL 10+). Postgres only
+# allows one event per trigger when transition tables are used, hence three.
+POSTGRES_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION profile_funnel_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_upsert_changes(_select_rows('new_rows'))}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_upsert_changes(_select_rows('old_rows', '-'))}
+        ELSE
+            {_upsert_changes(_select_rows('old_rows', '-'), _select_rows('new_rows'))}
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS profile_funnel_insert ON profiles",
+    "DROP TRIGGER IF EXISTS profile_funnel_delete ON profiles",
+    "DROP TRIGGER IF EXISTS profile_funnel_update ON profiles",
+    """
+    CREATE TRIGGER profile_funnel_insert AFTER INSERT ON profiles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION profile_funnel_apply()
+    """,
+    """
+    CREATE TRIGGER profile_funnel_delete AFTER DELETE ON profiles
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION profile_funnel_apply()
+    """,
+    """
+    CREATE TRIGGER profile_funnel_update AFTER UPDATE ON profiles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION profile_funnel_apply()
+    """,
+]
+
+# SQLite has no statement-level triggers; row triggers keep local runs and tests consistent
+FUNNEL_COLUMNS_CHANGED = ", ".join(FUNNEL_KEYS + FUNNEL_STAGES)
+SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS profile_funnel_insert AFTER INSERT ON profiles BEGIN
+        {_upsert_row('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS profile_funnel_delete AFTER DELETE ON profiles BEGIN
+        {_upsert_row('old', '-')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS profile_funnel_update AFTER UPDATE OF {FUNNEL_COLUMNS_CHANGED} ON profiles BEGIN
+        {_upsert_row('old', '-')}
+        {_upsert_row('new')}
+    END
+    """,
+]
+
+
+def upgrade():
+    counts = [
+        sa.Column(name, sa.Integer(), nullable=False, server_default="0")
+        for name in ("total",) + FUNNEL_STAGES
+    ]
+    op.create_table(
+        "profile_funnel",
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("opener_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("story_id", sa.Integer(), autoincrement=False, nullable=False),
+        *counts,
+        sa.PrimaryKeyConstraint("source", "opener_id", "story_id"),
+    )
+    # Triggers plus a backfill from the existing profiles
+    bind = op.get_bind()
+    statements = {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}.get(bind.dialect.name)
+    if statements is None:
+        return
+    for statement in statements + REBUILD:
+        bind.exec_driver_sql(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for trigger in ("profile_funnel_insert", "profile_funnel_delete", "profile_funnel_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON profiles")
+        op.execute("DROP FUNCTION IF EXISTS profile_funnel_apply()")
+    elif bind.dialect.name == "sqlite":
+        for trigger in ("profile_funnel_insert", "profile_funnel_delete", "profile_funnel_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.drop_table("profile_funnel")
@@ -0,0 +1,29 @@
+"""Story list version, bumped by every story write
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table = op.create_table(
+        "story_list_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # The one row every story write bumps
+    op.bulk_insert(table, [{"id": 1, "version": 1}])
+
+
+def downgrade():
+    op.drop_table("story_list_version")
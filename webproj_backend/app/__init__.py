@@ -1,5 +0,0 @@
-from app.core.config import settings
-from app.database import Base, engine
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
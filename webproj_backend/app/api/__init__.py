@@ -1 +1 @@
-from app.api.endpoints import dialogs, profiles, stories
+from app.api.endpoints import dialogs, profiles, stories, monitoring
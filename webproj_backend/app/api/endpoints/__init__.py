@@ -1,3 +1,5 @@
 from app.api.endpoints.dialogs import router as dialogs_router
 from app.api.endpoints.profiles import router as profiles_router
 from app.api.endpoints.stories import router as stories_router
+from app.api.endpoints.monitoring import router as monitoring_router
+from app.api.endpoints.analytics import router as analytics_router
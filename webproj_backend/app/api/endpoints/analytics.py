@@ -0,0 +1,91 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, case, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas, models
+from app.api import deps
+from app.core.funnel import FUNNEL_KEYS, FUNNEL_STAGES
+
+router = APIRouter()
+
+def funnel_groups(group_by: List[str] = Query([])) -> List[str]:
+    # Accept both ?group_by=source&group_by=opener_id and ?group_by=source,opener_id
+    groups = [part.strip() for item in group_by for part in item.split(",") if part.strip()]
+    unknown = set(groups) - set(FUNNEL_KEYS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot group by: {', '.join(sorted(unknown))}"
+        )
+    return list(dict.fromkeys(groups))
+
+def live_funnel(groups: List[str], criteria: list):
+    # Aggregates profiles directly; needed for filters the summary doesn't keep (age)
+    reached = []
+    stages = []
+    for name in FUNNEL_STAGES:
+        reached.append(getattr(models.Profile, name).is_(True))
+        stages.append(func.coalesce(func.sum(case((and_(*reached), 1), else_=0)), 0).label(name))
+
+    group_columns = [getattr(models.Profile, name) for name in groups]
+    return (
+        select(*group_columns, func.count().label("total"), *stages)
+        .where(*criteria)
+        .group_by(*group_columns)
+    )
+
+def summary_funnel(groups: List[str], criteria: list):
+    # Sums the trigger-maintained profile_funnel rows: work grows with the number
+    # of source/opener/story combinations, not with the number of profiles
+    funnel = models.ProfileFunnel
+    group_columns = [
+        funnel.source if name == "source" else func.nullif(getattr(funnel, name), 0).label(name)
+        for name in groups
+    ]
+    counts = [
+        func.coalesce(func.sum(getattr(funnel, name)), 0).label(name)
+        for name in ("total",) + FUNNEL_STAGES
+    ]
+    query = select(*group_columns, *counts).where(*criteria)
+    if groups:
+        query = query.group_by(*group_columns).having(func.sum(funnel.total) > 0)
+    return query
+
+@router.get("/funnel", response_model=List[schemas.FunnelRow])
+async def get_funnel(
+    groups: List[str] = Depends(funnel_groups),
+    source: Optional[str] = None,
+    opener_id: Optional[int] = None,
+    story_id: Optional[int] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    live: bool = Query(False, description="Aggregate profiles instead of reading the summary table"),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    if live or min_age is not None or max_age is not None:
+        profile = models.Profile
+        criteria = []
+        if source is not None:
+            criteria.append(profile.source == source)
+        if opener_id is not None:
+            criteria.append(profile.opener_id == opener_id)
+        if story_id is not None:
+            criteria.append(profile.story_id == story_id)
+        if min_age is not None:
+            criteria.append(profile.age >= min_age)
+        if max_age is not None:
+            criteria.append(profile.age <= max_age)
+        query = live_funnel(groups, criteria)
+    else:
+        funnel = models.ProfileFunnel
+        criteria = []
+        if source is not None:
+            criteria.append(funnel.source == source)
+        if opener_id is not None:
+            criteria.append(funnel.opener_id == opener_id)
+        if story_id is not None:
+            criteria.append(funnel.story_id == story_id)
+        query = summary_funnel(groups, criteria)
+
+    result = await db.execute(query.order_by(desc("total")))
+    return result.mappings().all()
@@ -1,87 +1,189 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import random
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app import schemas, models
 from app.api import deps
+from app.core.cache import get_cache
+from app.core.etag import cached_json_response
+from app.core.sampler import sampler_cache
+from app.core.serialization import ResponseAdapter
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Opener])
-def get_openers(db: Session = Depends(deps.get_db)):
-    return db.query(models.Opener).all()
+# The opener catalog changes rarely and is read on every conversation screen,
+# so reads are served as pre-serialized JSON and writes invalidate it
+catalog_cache = get_cache("openers")
+# Deleting an opener nulls profiles.opener_id, so cached profiles that pointed at it go stale
+profile_cache = get_cache("profiles")
+openers_adapter = ResponseAdapter(List[schemas.Opener])
 
-@router.get("/{opener_id}", response_model=schemas.Opener)
-def get_opener(opener_id: int, db: Session = Depends(deps.get_db)):
-    opener = db.query(models.Opener).filter(models.Opener.id == opener_id).first()
+async def invalidate_catalog(opener_id: Optional[int] = None):
+    keys = ["list"]
+    if opener_id is not None:
+        keys.append(str(opener_id))
+    await catalog_cache.invalidate(*keys)
+
+def opener_query():
+    return select(models.Opener).options(selectinload(models.Opener.continue_options))
+
+async def get_opener_or_404(db: AsyncSession, opener_id: int) -> models.Opener:
+    # populate_existing so a reload after a write picks up changed collections
+    opener = await db.scalar(
+        opener_query()
+        .where(models.Opener.id == opener_id)
+        .execution_options(populate_existing=True)
+    )
     if not opener:
         raise HTTPException(status_code=404, detail="Opener not found")
     return opener
 
+MAX_SAMPLES = 10000
+default_rng = random.Random()
+
+def sample_rng(seed: Optional[int]) -> random.Random:
+    # A seed makes batch draws reproducible for simulations
+    return random.Random(seed) if seed is not None else default_rng
+
+@router.get("/", response_model=List[schemas.Opener])
+async def get_openers(request: Request, db: AsyncSession = Depends(deps.get_db)):
+    async def build():
+        result = await db.scalars(opener_query())
+        return openers_adapter.dump_json(result.all())
+
+    content = await catalog_cache.get_or_set("list", build)
+    return cached_json_response(request, content)
+
+@router.get("/sample", response_model=List[schemas.Opener])
+async def sample_openers(
+    context: str,
+    n: int = Query(1, ge=1, le=MAX_SAMPLES),
+    seed: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    async def build():
+        result = await db.scalars(opener_query().where(models.Opener.context == context))
+        openers = [schemas.Opener.model_validate(opener) for opener in result.all()]
+        return openers, [1.0] * len(openers)
+
+    table = await sampler_cache.get(("context", context), build)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"No openers for context {context}")
+    return table.sample(n, sample_rng(seed))
+
+@router.get("/{opener_id}", response_model=schemas.Opener)
+async def get_opener(opener_id: int, request: Request, db: AsyncSession = Depends(deps.get_db)):
+    async def build():
+        opener = await get_opener_or_404(db, opener_id)
+        return schemas.Opener.model_validate(opener).model_dump_json().encode()
+
+    content = await catalog_cache.get_or_set(str(opener_id), build)
+    return cached_json_response(request, content)
+
 @router.post("/", response_model=schemas.Opener)
-def create_opener(opener: schemas.OpenerCreate, db: Session = Depends(deps.get_db)):
-    db_opener = models.Opener(**opener.model_dump())
+async def create_opener(opener: schemas.OpenerCreate, db: AsyncSession = Depends(deps.get_db)):
+    # Start with an empty, already-loaded collection so serializing it needs no lazy load
+    db_opener = models.Opener(**opener.model_dump(), continue_options=[])
     db.add(db_opener)
-    db.commit()
-    db.refresh(db_opener)
+    await db.commit()
+    await invalidate_catalog()
+    await sampler_cache.invalidate(("context", db_opener.context))
     return db_opener
 
 @router.put("/{opener_id}", response_model=schemas.Opener)
-def update_opener(
-    opener_id: int, 
-    opener: schemas.OpenerCreate, 
-    db: Session = Depends(deps.get_db)
+async def update_opener(
+    opener_id: int,
+    opener: schemas.OpenerCreate,
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_opener = db.query(models.Opener).filter(models.Opener.id == opener_id).first()
-    if not db_opener:
-        raise HTTPException(status_code=404, detail="Opener not found")
-    
+    db_opener = await get_opener_or_404(db, opener_id)
+    old_context = db_opener.context
+
     for key, value in opener.model_dump().items():
         setattr(db_opener, key, value)
-    
-    db.commit()
-    db.refresh(db_opener)
+
+    await db.commit()
+    await invalidate_catalog(opener_id)
+    await sampler_cache.invalidate(("context", old_context), ("context", db_opener.context))
     return db_opener
 
 @router.delete("/{opener_id}")
-def delete_opener(opener_id: int, db: Session = Depends(deps.get_db)):
-    db_opener = db.query(models.Opener).filter(models.Opener.id == opener_id).first()
+async def delete_opener(opener_id: int, db: AsyncSession = Depends(deps.get_db)):
+    db_opener = await db.get(models.Opener, opener_id)
     if not db_opener:
         raise HTTPException(status_code=404, detail="Opener not found")
-    
-    db.delete(db_opener)
-    db.commit()
+
+    context = db_opener.context
+    profiles = await db.scalars(select(models.Profile.id).where(models.Profile.opener_id == opener_id))
+    profile_keys = [str(profile_id) for profile_id in profiles.all()]
+    await db.delete(db_opener)
+    await db.commit()
+    await invalidate_catalog(opener_id)
+    await profile_cache.invalidate(*profile_keys)
+    await sampler_cache.invalidate(("context", context), ("options", opener_id))
     return {"ok": True}
 
 @router.post("/{opener_id}/options", response_model=schemas.ContinueOption)
-def create_continue_option(
+async def create_continue_option(
     opener_id: int,
     option: schemas.ContinueOptionCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_opener = db.query(models.Opener).filter(models.Opener.id == opener_id).first()
+    db_opener = await db.get(models.Opener, opener_id)
     if not db_opener:
         raise HTTPException(status_code=404, detail="Opener not found")
-    
+
     db_option = models.ContinueOption(**option.model_dump(), opener_id=opener_id)
     db.add(db_option)
-    db.commit()
-    db.refresh(db_option)
+    await db.commit()
+    await db.refresh(db_option)
+    await invalidate_catalog(opener_id)
+    await sampler_cache.invalidate(("options", opener_id), ("context", db_opener.context))
     return db_option
 
+@router.get("/{opener_id}/options/sample", response_model=List[schemas.ContinueOption])
+async def sample_continue_options(
+    opener_id: int,
+    n: int = Query(1, ge=1, le=MAX_SAMPLES),
+    seed: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    async def build():
+        result = await db.scalars(
+            select(models.ContinueOption).where(models.ContinueOption.opener_id == opener_id)
+        )
+        options = [schemas.ContinueOption.model_validate(option) for option in result.all()]
+        return options, [option.weight for option in options]
+
+    table = await sampler_cache.get(("options", opener_id), build)
+    if table is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Opener not found or has no continue options with a positive weight"
+        )
+    return table.sample(n, sample_rng(seed))
+
 @router.delete("/{opener_id}/options/{option_id}")
-def delete_continue_option(
+async def delete_continue_option(
     opener_id: int,
     option_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_option = db.query(models.ContinueOption).filter(
-        models.ContinueOption.id == option_id,
-        models.ContinueOption.opener_id == opener_id
-    ).first()
-    
+    db_option = await db.scalar(
+        select(models.ContinueOption).where(
+            models.ContinueOption.id == option_id,
+            models.ContinueOption.opener_id == opener_id
+        )
+    )
+
     if not db_option:
         raise HTTPException(status_code=404, detail="Continue option not found")
-    
-    db.delete(db_option)
-    db.commit()
+
+    context = await db.scalar(select(models.Opener.context).where(models.Opener.id == opener_id))
+    await db.delete(db_option)
+    await db.commit()
+    await invalidate_catalog(opener_id)
+    await sampler_cache.invalidate(("options", opener_id), ("context", context))
     return {"ok": True}
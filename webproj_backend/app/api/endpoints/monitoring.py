@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.cache import caches
+from app.core.db_pool import pool_stats
+from app.core.metrics import route_metrics
+from app.database import engine, async_engine
+
+router = APIRouter()
+
+@router.get("/pool")
+async def get_pool_stats():
+    # Per worker process: checked-out/overflow counts and checkout wait times
+    return {
+        "async": pool_stats(async_engine.pool),
+        "sync": pool_stats(engine.pool),
+    }
+
+@router.get("/cache")
+async def get_cache_stats():
+    return {name: cache.stats() for name, cache in caches.items()}
+
+@router.get("/startup")
+async def get_startup_stats(request: Request):
+    # Lifespan startup time of this worker; benchmarks/cold_start.py measures import time
+    return {
+        "seconds": getattr(request.app.state, "startup_seconds", None),
+        "budget_seconds": settings.STARTUP_BUDGET_SECONDS,
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus scrape target; per worker process like the other stats here
+    return PlainTextResponse(route_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,12 +1,30 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload, raiseload
 from app import schemas, models
 from app.api import deps
-import shutil
+from app.core.avatars import process_avatar, remove_replaced_avatar
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.etag import cache_variant, cached_json_response
+from app.core.fieldsets import PROFILE_FIELDS
+from app.core.media import UploadLimitRoute, save_upload, upload_limit
+from app.core.serialization import ResponseAdapter, json_response
+from app.database import AsyncSessionLocal
+import csv
+import io
+import json
+from itertools import islice
+import uuid
 from pathlib import Path
 
-router = APIRouter()
+router = APIRouter(route_class=UploadLimitRoute)
 
 def ensure_avatar_dir():
     avatar_dir = Path("app/static/avatars")
@@ -18,93 +36,459 @@ def ensure_avatar_dir():
         # You'll need to provide the default avatar.png file
         raise FileNotFoundError("Default avatar.png not found. Please add it to the avatars directory.")
 
-@router.get("/", response_model=List[schemas.Profile])
-def get_profiles(db: Session = Depends(deps.get_db)):
-    return db.query(models.Profile).order_by(models.Profile.id.desc()).all()
+PROFILE_EXPANDABLE = ("opener", "story")
 
-@router.get("/{profile_id}", response_model=schemas.Profile)
-def get_profile(profile_id: int, db: Session = Depends(deps.get_db)):
-    profile = db.query(models.Profile).filter(models.Profile.id == profile_id).first()
+def profile_load_options(expand: List[str] = ()):
+    # Accept both ?expand=opener&expand=story and ?expand=opener,story
+    expand = {part.strip() for item in expand for part in item.split(",") if part.strip()}
+    unknown = expand - set(PROFILE_EXPANDABLE)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot expand: {', '.join(sorted(unknown))}"
+        )
+
+    # One extra SELECT per collection, regardless of how many profiles are loaded
+    options = [
+        selectinload(models.Profile.hobbies),
+        selectinload(models.Profile.notes),
+    ]
+
+    if "opener" in expand:
+        options.append(
+            joinedload(models.Profile.opener).selectinload(models.Opener.continue_options)
+        )
+    else:
+        options.append(raiseload(models.Profile.opener))
+
+    if "story" in expand:
+        story = joinedload(models.Profile.story)
+        options.append(story.selectinload(models.Story.languages).selectinload(models.Language.contents))
+        options.append(story.selectinload(models.Story.formats))
+    else:
+        options.append(raiseload(models.Profile.story))
+
+    return options
+
+async def get_profile_or_404(
+    db: AsyncSession,
+    profile_id: int,
+    expand: List[str] = (),
+    options: Optional[list] = None
+) -> models.Profile:
+    # populate_existing so a reload after a write picks up changed collections
+    profile = await db.scalar(
+        select(models.Profile)
+        .options(*(options if options is not None else profile_load_options(expand)))
+        .where(models.Profile.id == profile_id)
+        .execution_options(populate_existing=True)
+    )
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
 
+def profile_filters(
+    source: Optional[str] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    answered_opener: Optional[bool] = None,
+    story_discussed: Optional[bool] = None,
+    closed_for_meet: Optional[bool] = None,
+    closed_for_sex: Optional[bool] = None,
+) -> list:
+    # WHERE clauses shared by every endpoint that selects a set of profiles
+    filters = []
+    if source is not None:
+        filters.append(models.Profile.source == source)
+    if min_age is not None:
+        filters.append(models.Profile.age >= min_age)
+    if max_age is not None:
+        filters.append(models.Profile.age <= max_age)
+
+    checkpoints = {
+        "answered_opener": answered_opener,
+        "story_discussed": story_discussed,
+        "closed_for_meet": closed_for_meet,
+        "closed_for_sex": closed_for_sex,
+    }
+    for name, value in checkpoints.items():
+        if value is not None:
+            filters.append(getattr(models.Profile, name) == value)
+
+    return filters
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Serialized single-profile bodies keyed by id. Only reads without openers or
+# stories (?expand= or ?fields=opener.*) are cached: those change elsewhere.
+profile_cache = get_cache("profiles")
+profiles_adapter = ResponseAdapter(List[schemas.Profile])
+profile_adapter = ResponseAdapter(schemas.Profile)
+
+async def invalidate_profile(profile_id: int):
+    await profile_cache.invalidate(str(profile_id))
+
+@router.get("/", response_model=List[schemas.Profile])
+async def get_profiles(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Return profiles with id below this value"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE,
+        description=f"Page size; defaults to {DEFAULT_PAGE_SIZE} with a cursor, all profiles without one"
+    ),
+    filters: list = Depends(profile_filters),
+    fields: List[str] = Query([]),
+    expand: List[str] = Query([]),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    # ?fields= loads only the selected columns and relationships
+    selection = PROFILE_FIELDS.selection(fields, expand)
+    if selection:
+        options = PROFILE_FIELDS.load_options(selection)
+    else:
+        options = profile_load_options(expand)
+
+    query = select(models.Profile).where(*filters)
+
+    # Keyset pagination: newest first, continue below the last id of the previous page
+    if cursor is not None:
+        query = query.where(models.Profile.id < cursor)
+        limit = limit or DEFAULT_PAGE_SIZE
+
+    # Clients that send neither limit nor cursor predate pagination and get every profile.
+    # Otherwise fetch one extra row to know whether another page exists.
+    query = query.options(*options).order_by(models.Profile.id.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    profiles = (await db.scalars(query)).all()
+
+    if limit is not None and len(profiles) > limit:
+        profiles = profiles[:limit]
+        response.headers["X-Next-Cursor"] = str(profiles[-1].id)
+
+    if selection:
+        return json_response(PROFILE_FIELDS.dump_json(profiles, selection), response)
+    if settings.FAST_JSON_RESPONSES:
+        return profiles_adapter.response(profiles, response)
+    return profiles
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CSV_COLUMNS = [
+    "id", "name", "age", "source", "telegram_tag", "birth_date", "photo",
+    "opener_id", "story_id", "answered_opener", "story_discussed",
+    "closed_for_meet", "closed_for_sex", "hobbies", "notes",
+]
+
+def profile_ndjson_rows(profiles) -> str:
+    return "".join(
+        schemas.Profile.model_validate(profile).model_dump_json(exclude={"opener", "story"}) + "\n"
+        for profile in profiles
+    )
+
+def profile_csv_rows(profiles, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_CSV_COLUMNS)
+    for profile in profiles:
+        writer.writerow([
+            profile.id, profile.name, profile.age, profile.source, profile.telegram_tag,
+            profile.birth_date, profile.photo, profile.opener_id, profile.story_id,
+            profile.answered_opener, profile.story_discussed,
+            profile.closed_for_meet, profile.closed_for_sex,
+            ";".join(hobby.name for hobby in profile.hobbies),
+            json.dumps({note.key: note.value for note in profile.notes}, ensure_ascii=False),
+        ])
+    return buffer.getvalue()
+
+async def stream_profiles(filters: list, format: str):
+    # The export outlives the request-scoped session, so it owns its own.
+    # stream() uses a server-side cursor and yield_per keeps one batch in memory:
+    # the identity map holds rows weakly, so a batch is freed once written.
+    # (expunge_all() here would invalidate the map the next partition loads into.)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(
+            select(models.Profile)
+            .where(*filters)
+            .options(*profile_load_options())
+            .order_by(models.Profile.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        first = True
+        async for batch in result.partitions():
+            if format == "csv":
+                yield profile_csv_rows(batch, header=first)
+            else:
+                yield profile_ndjson_rows(batch)
+            first = False
+
+        if first and format == "csv":
+            yield profile_csv_rows([], header=True)
+
+@router.get("/export")
+async def export_profiles(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: list = Depends(profile_filters)
+):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_profiles(filters, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profiles.{format}"'}
+    )
+
+IMPORT_CHUNK_SIZE = 1000
+
+def read_import_rows(file, format: str):
+    # Yields (row number, raw row); CSV uses the same columns as the export
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    if format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, row
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if line.strip():
+                yield row_number, line
+
+def parse_import_row(raw, format: str) -> schemas.ProfileImport:
+    if format == "csv":
+        data = {key: value for key, value in raw.items() if key and value not in ("", None)}
+        data.pop("id", None)
+        if "hobbies" in data:
+            data["hobbies"] = [{"name": name} for name in data["hobbies"].split(";") if name.strip()]
+        if "notes" in data:
+            notes = json.loads(data["notes"])
+            if not isinstance(notes, dict):
+                raise ValueError("notes must be a JSON object of key/value pairs")
+            data["notes"] = [{"key": key, "value": value} for key, value in notes.items()]
+    else:
+        data = json.loads(raw)
+
+    row = schemas.ProfileImport.model_validate(data)
+    for note in row.notes:
+        note.key = note.key.strip()
+        note.value = note.value.strip()
+        if not note.key or not note.value:
+            raise ValueError("Note key and value cannot be empty")
+    return row
+
+def read_import_chunk(rows, format: str):
+    chunk, errors = [], []
+    for row_number, raw in islice(rows, IMPORT_CHUNK_SIZE):
+        try:
+            chunk.append((row_number, parse_import_row(raw, format)))
+        except (ValueError, ValidationError) as e:
+            errors.append(schemas.ImportRowError(row=row_number, detail=str(e)))
+    return chunk, errors
+
+async def insert_profiles(db: AsyncSession, rows: List[schemas.ProfileImport]):
+    # Multi-row INSERT ... RETURNING; ids come back in parameter order
+    profile_ids = await db.scalars(
+        insert(models.Profile).returning(models.Profile.id, sort_by_parameter_order=True),
+        [row.model_dump(exclude={"hobbies", "notes"}) for row in rows]
+    )
+
+    hobbies, notes = [], []
+    for profile_id, row in zip(profile_ids.all(), rows):
+        hobbies.extend({"name": hobby.name, "profile_id": profile_id} for hobby in row.hobbies)
+        notes.extend({"key": note.key, "value": note.value, "profile_id": profile_id} for note in row.notes)
+
+    if hobbies:
+        await db.execute(insert(models.Hobby), hobbies)
+    if notes:
+        await db.execute(insert(models.Note), notes)
+
+async def import_chunk(db: AsyncSession, chunk) -> List[schemas.ImportRowError]:
+    try:
+        await insert_profiles(db, [row for _, row in chunk])
+        await db.commit()
+        return []
+    except SQLAlchemyError:
+        await db.rollback()
+
+    # Something in the chunk was rejected by the database; retry row by row
+    # in savepoints so only the offending rows are reported
+    errors = []
+    for row_number, row in chunk:
+        try:
+            async with db.begin_nested():
+                await insert_profiles(db, [row])
+        except SQLAlchemyError as e:
+            errors.append(schemas.ImportRowError(row=row_number, detail=str(getattr(e, "orig", None) or e)))
+    await db.commit()
+    return errors
+
+@router.post("/import", response_model=schemas.ProfileImportResult)
+async def import_profiles(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+
+    rows = read_import_rows(file.file, format)
+    imported = 0
+    errors = []
+
+    while True:
+        # Parsing and validation are CPU-bound, keep them off the event loop
+        try:
+            chunk, chunk_errors = await run_in_threadpool(read_import_chunk, rows, format)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Could not read upload after {imported} imported rows: {e}"
+            )
+        errors.extend(chunk_errors)
+        if not chunk:
+            if not chunk_errors:
+                break
+            continue
+
+        failed = await import_chunk(db, chunk)
+        errors.extend(failed)
+        imported += len(chunk) - len(failed)
+
+    errors.sort(key=lambda error: error.row)
+    return schemas.ProfileImportResult(imported=imported, failed=len(errors), errors=errors)
+
+@router.patch("/checkpoints", response_model=schemas.ProfileBulkUpdateResult)
+async def update_checkpoints(
+    update_request: schemas.ProfileBulkCheckpointUpdate,
+    filters: list = Depends(profile_filters),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    changes = update_request.checkpoints.model_dump(exclude_none=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No checkpoints to update")
+    if update_request.ids is None and not filters:
+        raise HTTPException(status_code=400, detail="Pass profile ids or at least one filter")
+
+    if update_request.ids is not None:
+        filters.append(models.Profile.id.in_(update_request.ids))
+
+    # One UPDATE ... RETURNING; rows that already have the values are left
+    # alone, so the count is what actually changed. The funnel triggers
+    # apply the net change for the whole statement.
+    result = await db.scalars(
+        update(models.Profile)
+        .where(
+            *filters,
+            or_(*(getattr(models.Profile, name).is_distinct_from(value) for name, value in changes.items()))
+        )
+        .values(**changes)
+        .returning(models.Profile.id)
+        .execution_options(synchronize_session=False)
+    )
+    profile_ids = sorted(result.all())
+    await db.commit()
+
+    await profile_cache.invalidate(*(str(profile_id) for profile_id in profile_ids))
+    return schemas.ProfileBulkUpdateResult(updated=len(profile_ids), ids=profile_ids)
+
+@router.get("/{profile_id}", response_model=schemas.Profile)
+async def get_profile(
+    profile_id: int,
+    request: Request,
+    fields: List[str] = Query([]),
+    expand: List[str] = Query([]),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    selection = PROFILE_FIELDS.selection(fields, expand)
+
+    async def build():
+        if selection:
+            options = PROFILE_FIELDS.load_options(selection)
+            return PROFILE_FIELDS.dump_json(await get_profile_or_404(db, profile_id, options=options), selection)
+        return profile_adapter.dump_json(await get_profile_or_404(db, profile_id, expand))
+
+    if expand or (selection and selection.keys() & set(PROFILE_EXPANDABLE)):
+        return cached_json_response(request, await build())
+
+    content = await profile_cache.get_or_set(str(profile_id), build, cache_variant(selection))
+    return cached_json_response(request, content)
+
 @router.post("/", response_model=schemas.Profile)
-def create_profile(profile: schemas.ProfileCreate, db: Session = Depends(deps.get_db)):
+async def create_profile(profile: schemas.ProfileCreate, db: AsyncSession = Depends(deps.get_db)):
     db_profile = models.Profile(**profile.model_dump())
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
-    return db_profile
+    await db.commit()
+    return await get_profile_or_404(db, db_profile.id)
 
 @router.put("/{profile_id}", response_model=schemas.Profile)
-def update_profile(
+async def update_profile(
     profile_id: int,
     profile: schemas.ProfileUpdate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_profile = db.query(models.Profile).filter(models.Profile.id == profile_id).first()
-    if not db_profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    db_profile = await get_profile_or_404(db, profile_id)
     
     profile_data = profile.model_dump(exclude_unset=True)
     for key, value in profile_data.items():
         setattr(db_profile, key, value)
     
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
+    await invalidate_profile(profile_id)
     return db_profile
 
 @router.delete("/{profile_id}")
-def delete_profile(profile_id: int, db: Session = Depends(deps.get_db)):
-    db_profile = db.query(models.Profile).filter(models.Profile.id == profile_id).first()
+async def delete_profile(profile_id: int, db: AsyncSession = Depends(deps.get_db)):
+    db_profile = await db.get(models.Profile, profile_id)
     if not db_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    db.delete(db_profile)
-    db.commit()
+    await db.delete(db_profile)
+    await db.commit()
+    await invalidate_profile(profile_id)
+    await remove_replaced_avatar(db, db_profile.photo)
     return {"ok": True}
 
 # Hobby endpoints
 @router.post("/{profile_id}/hobbies", response_model=schemas.Hobby)
-def create_hobby(
+async def create_hobby(
     profile_id: int,
     hobby: schemas.HobbyCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_profile = db.query(models.Profile).filter(models.Profile.id == profile_id).first()
+    db_profile = await db.get(models.Profile, profile_id)
     if not db_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
     db_hobby = models.Hobby(**hobby.model_dump(), profile_id=profile_id)
     db.add(db_hobby)
-    db.commit()
-    db.refresh(db_hobby)
+    await db.commit()
+    await invalidate_profile(profile_id)
+    await db.refresh(db_hobby)
     return db_hobby
 
 @router.delete("/{profile_id}/hobbies/{hobby_id}")
-def delete_hobby(
+async def delete_hobby(
     profile_id: int,
     hobby_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_hobby = db.query(models.Hobby).filter(
-        models.Hobby.id == hobby_id,
-        models.Hobby.profile_id == profile_id
-    ).first()
+    db_hobby = await db.scalar(
+        select(models.Hobby).where(
+            models.Hobby.id == hobby_id,
+            models.Hobby.profile_id == profile_id
+        )
+    )
     if not db_hobby:
         raise HTTPException(status_code=404, detail="Hobby not found")
     
-    db.delete(db_hobby)
-    db.commit()
+    await db.delete(db_hobby)
+    await db.commit()
+    await invalidate_profile(profile_id)
     return {"ok": True}
 
 # Note endpoints
 @router.post("/{profile_id}/notes", response_model=schemas.Note)
-def create_note(
+async def create_note(
     profile_id: int,
     note: schemas.NoteCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     # Trim and validate input
     key = note.key.strip()
@@ -116,7 +500,7 @@ def create_note(
             detail="Note key and value cannot be empty"
         )
     
-    db_profile = db.query(models.Profile).filter(models.Profile.id == profile_id).first()
+    db_profile = await db.get(models.Profile, profile_id)
     if not db_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
@@ -126,16 +510,17 @@ def create_note(
         profile_id=profile_id
     )
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await invalidate_profile(profile_id)
+    await db.refresh(db_note)
     return db_note
 
 @router.put("/{profile_id}/notes/{note_id}", response_model=schemas.Note)
-def update_note(
+async def update_note(
     profile_id: int,
     note_id: int,
     note: schemas.NoteCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     # Trim and validate input
     key = note.key.strip()
@@ -147,61 +532,69 @@ def update_note(
             detail="Note key and value cannot be empty"
         )
     
-    db_note = db.query(models.Note).filter(
-        models.Note.id == note_id,
-        models.Note.profile_id == profile_id
-    ).first()
+    db_note = await db.scalar(
+        select(models.Note).where(
+            models.Note.id == note_id,
+            models.Note.profile_id == profile_id
+        )
+    )
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
     
     db_note.key = key
     db_note.value = value
     
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await invalidate_profile(profile_id)
+    await db.refresh(db_note)
     return db_note
 
 @router.delete("/{profile_id}/notes/{note_id}")
-def delete_note(
+async def delete_note(
     profile_id: int,
     note_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_note = db.query(models.Note).filter(
-        models.Note.id == note_id,
-        models.Note.profile_id == profile_id
-    ).first()
+    db_note = await db.scalar(
+        select(models.Note).where(
+            models.Note.id == note_id,
+            models.Note.profile_id == profile_id
+        )
+    )
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
     
-    db.delete(db_note)
-    db.commit()
+    await db.delete(db_note)
+    await db.commit()
+    await invalidate_profile(profile_id)
     return {"ok": True}
 
 @router.post("/{profile_id}/avatar", response_model=schemas.Profile)
+@upload_limit(settings.MAX_AVATAR_UPLOAD_BYTES)
 async def upload_avatar(
     profile_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    ensure_avatar_dir()
+    await run_in_threadpool(ensure_avatar_dir)
     
-    db_profile = db.query(models.Profile).filter(models.Profile.id == profile_id).first()
-    if not db_profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    db_profile = await get_profile_or_404(db, profile_id)
     
     # Generate unique filename
     file_extension = file.filename.split('.')[-1]
-    avatar_name = f"avatar_{profile_id}.{file_extension}"
+    avatar_name = f"avatar_{profile_id}_{uuid.uuid4().hex[:8]}.{file_extension}"
     avatar_path = Path("app/static/avatars") / avatar_name
     
-    # Save file
-    with avatar_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Stream to disk in chunks off the event loop, rejecting oversized uploads early
+    await save_upload(file, avatar_path, settings.MAX_AVATAR_UPLOAD_BYTES)
     
-    # Update profile with relative URL path
+    # Serve the original until the resized, content-hashed variants are ready
+    previous_photo = db_profile.photo
     db_profile.photo = f"/static/avatars/{avatar_name}"
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
+    await invalidate_profile(profile_id)
+    await remove_replaced_avatar(db, previous_photo)
+    background_tasks.add_task(process_avatar, profile_id, avatar_path)
     
     return db_profile
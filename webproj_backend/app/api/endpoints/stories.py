@@ -1,229 +1,470 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app import schemas, models
 from app.api import deps
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.etag import cache_variant, cached_json_response, etag_matches, make_etag, not_modified
+from app.core.fieldsets import STORY_FIELDS
+from app.core.media import RangeFileResponse, UploadLimitRoute, media_path, remove_media, save_audio, upload_limit
+from app.core.reference import reference_data
+from app.core.serialization import ResponseAdapter
+from app.core.search import search_stories
 
-router = APIRouter()
+router = APIRouter(route_class=UploadLimitRoute)
 
-@router.get("/", response_model=List[schemas.Story])
-def get_stories(db: Session = Depends(deps.get_db)):
-    stories = db.query(models.Story).all()
-    return stories
+# Serialized list/detail bodies, keyed "list" and the story id with one entry
+# per version and field selection; every write invalidates the list and the
+# story it touched
+story_cache = get_cache("stories")
+# Deleting a story nulls profiles.story_id, so cached profiles that pointed at it go stale
+profile_cache = get_cache("profiles")
+stories_adapter = ResponseAdapter(List[schemas.Story])
+story_adapter = ResponseAdapter(schemas.Story)
 
-@router.get("/{story_id}", response_model=schemas.Story)
-def get_story(story_id: int, db: Session = Depends(deps.get_db)):
-    story = db.query(models.Story).filter(models.Story.id == story_id).first()
+async def invalidate_stories(*story_ids: int):
+    await story_cache.invalidate("list", *(str(story_id) for story_id in story_ids))
+
+async def referencing_profiles(db: AsyncSession, story_id: int) -> List[str]:
+    result = await db.scalars(select(models.Profile.id).where(models.Profile.story_id == story_id))
+    return [str(profile_id) for profile_id in result.all()]
+
+def story_query(selection: Optional[dict] = None):
+    # With a ?fields= selection, load only the selected columns and relationships
+    if selection:
+        return select(models.Story).options(*STORY_FIELDS.load_options(selection))
+    return select(models.Story).options(
+        selectinload(models.Story.languages).selectinload(models.Language.contents),
+        selectinload(models.Story.formats)
+    )
+
+async def get_story_or_404(db: AsyncSession, story_id: int, selection: Optional[dict] = None) -> models.Story:
+    # populate_existing so a reload after a write picks up changed collections
+    story = await db.scalar(
+        story_query(selection)
+        .where(models.Story.id == story_id)
+        .execution_options(populate_existing=True)
+    )
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     return story
 
+async def touch_story_list(db: AsyncSession):
+    # Any insert, update or delete of a story must bump the list version
+    await db.execute(
+        update(models.StoryListVersion)
+        .values(version=models.StoryListVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+async def touch_story(db: AsyncSession, story_id: int):
+    # Any change to a story's languages or contents must bump its version
+    await db.execute(
+        update(models.Story)
+        .where(models.Story.id == story_id)
+        .values(version=models.Story.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await touch_story_list(db)
+
+async def audio_paths(db: AsyncSession, *criteria) -> List[str]:
+    # Stored paths of audio contents matching criteria, so files can be removed with their rows
+    result = await db.scalars(
+        select(models.Content.content)
+        .join(models.Format, models.Content.format_id == models.Format.id)
+        .where(models.Format.type == "audio", *criteria)
+    )
+    return result.all()
+
+@router.get("/", response_model=List[schemas.Story])
+async def get_stories(
+    request: Request,
+    fields: List[str] = Query([]),
+    expand: List[str] = Query([]),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    selection = STORY_FIELDS.selection(fields, expand)
+
+    version = await db.scalar(select(models.StoryListVersion.version))
+    variant = cache_variant(selection)
+    etag = make_etag("stories", version, variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    async def build():
+        stories = (await db.scalars(story_query(selection))).all()
+        if selection:
+            return STORY_FIELDS.dump_json(stories, selection)
+        return stories_adapter.dump_json(stories)
+
+    # The version is part of the entry, so a body is only served under its own ETag
+    content = await story_cache.get_or_set("list", build, f"{version}:{variant}")
+    return cached_json_response(request, content, etag)
+
+@router.get("/search", response_model=List[schemas.StorySearchHit])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    language: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+
+    # Fetch one extra hit to know whether another page exists
+    hits = await search_stories(db, q, language, limit + 1, offset)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return hits
+
+@router.get("/languages", response_model=List[str])
+async def get_language_codes():
+    # Served from the in-memory registry, no query
+    await reference_data.ensure_loaded()
+    return reference_data.known_language_codes()
+
+@router.get("/{story_id}", response_model=schemas.Story)
+async def get_story(
+    story_id: int,
+    request: Request,
+    fields: List[str] = Query([]),
+    expand: List[str] = Query([]),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    selection = STORY_FIELDS.selection(fields, expand)
+
+    version = await db.scalar(select(models.Story.version).where(models.Story.id == story_id))
+    if version is None:
+        raise HTTPException(status_code=404, detail="Story not found")
+
+    variant = cache_variant(selection)
+    etag = make_etag("story", story_id, version, variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # A story deleted since the version check raises inside build, so 404s are never cached
+    async def build():
+        story = await get_story_or_404(db, story_id, selection)
+        if selection:
+            return STORY_FIELDS.dump_json(story, selection)
+        return story_adapter.dump_json(story)
+
+    content = await story_cache.get_or_set(str(story_id), build, f"{version}:{variant}")
+    return cached_json_response(request, content, etag)
+
 @router.post("/", response_model=schemas.Story)
-def create_story(story: schemas.StoryCreate, db: Session = Depends(deps.get_db)):
-    # Create story
-    db_story = models.Story(title=story.title)
+async def create_story(story: schemas.StoryCreate, db: AsyncSession = Depends(deps.get_db)):
+    formats = await reference_data.formats(db, [story.format])
+    db_format = formats[story.format]
+
+    # Story, language and content are inserted together in a single commit
+    db_story = models.Story(
+        title=story.title,
+        formats=[db_format],
+        languages=[
+            models.Language(
+                code=story.language,
+                contents=[models.Content(content=story.content, format=db_format)]
+            )
+        ]
+    )
     db.add(db_story)
-    db.commit()
-    
-    # Create format if it doesn't exist
-    db_format = db.query(models.Format).filter(models.Format.type == story.format).first()
-    if not db_format:
-        db_format = models.Format(type=story.format)
-        db.add(db_format)
-        db.commit()
-    
-    # Add format to story
-    db_story.formats.append(db_format)
-    
-    # Create language with content
-    db_language = models.Language(code=story.language, story_id=db_story.id)
-    db.add(db_language)
-    db.commit()
-    
-    # Create content
-    db_content = models.Content(
-        content=story.content,
-        language_id=db_language.id,
-        format_id=db_format.id
+    await touch_story_list(db)
+    await db.commit()
+    await invalidate_stories()
+    reference_data.add_language_codes([story.language])
+
+    return await get_story_or_404(db, db_story.id)
+
+@router.post("/bulk", response_model=schemas.StoryBulkResult)
+async def create_stories_bulk(stories: List[schemas.StoryIngest], db: AsyncSession = Depends(deps.get_db)):
+    for index, story in enumerate(stories):
+        codes = [language.code for language in story.languages]
+        if len(codes) != len(set(codes)):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Story {index} ({story.title}) lists a language more than once"
+            )
+        if any(not language.contents for language in story.languages):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Story {index} ({story.title}) has a language without contents"
+            )
+
+    formats = await reference_data.formats(
+        db,
+        (format_type for story in stories for language in story.languages for format_type in language.contents)
     )
-    db.add(db_content)
-    db.commit()
-    
-    db.refresh(db_story)
-    return db_story
+
+    db_stories = []
+    for story in stories:
+        used = {format_type for language in story.languages for format_type in language.contents}
+        db_stories.append(models.Story(
+            title=story.title,
+            formats=[formats[format_type] for format_type in sorted(used)],
+            languages=[
+                models.Language(
+                    code=language.code,
+                    contents=[
+                        models.Content(content=content, format=formats[format_type])
+                        for format_type, content in language.contents.items()
+                    ]
+                )
+                for language in story.languages
+            ]
+        ))
+
+    # The unit of work batches each table into multi-row INSERTs; one commit,
+    # so a failure leaves no partially created stories behind
+    db.add_all(db_stories)
+    await touch_story_list(db)
+    await db.commit()
+    await invalidate_stories()
+    reference_data.add_language_codes(language.code for story in stories for language in story.languages)
+
+    return schemas.StoryBulkResult(created=len(db_stories), ids=[db_story.id for db_story in db_stories])
 
 @router.put("/{story_id}", response_model=schemas.Story)
-def update_story(
+async def update_story(
     story_id: int,
     story: schemas.StoryUpdate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    db_story = db.query(models.Story).filter(models.Story.id == story_id).first()
-    if not db_story:
-        raise HTTPException(status_code=404, detail="Story not found")
-    
+    db_story = await get_story_or_404(db, story_id)
+
     for key, value in story.model_dump().items():
         setattr(db_story, key, value)
-    
-    db.commit()
-    db.refresh(db_story)
+
+    await touch_story(db, story_id)
+    await db.commit()
+    await invalidate_stories(story_id)
     return db_story
 
 @router.delete("/{story_id}")
-def delete_story(story_id: int, db: Session = Depends(deps.get_db)):
-    db_story = db.query(models.Story).filter(models.Story.id == story_id).first()
+async def delete_story(story_id: int, db: AsyncSession = Depends(deps.get_db)):
+    db_story = await db.get(models.Story, story_id)
     if not db_story:
         raise HTTPException(status_code=404, detail="Story not found")
-    
-    db.delete(db_story)
-    db.commit()
+
+    orphaned = await audio_paths(
+        db,
+        models.Content.language_id.in_(
+            select(models.Language.id).where(models.Language.story_id == story_id)
+        )
+    )
+    profiles = await referencing_profiles(db, story_id)
+    await db.delete(db_story)
+    await touch_story_list(db)
+    await db.commit()
+    await invalidate_stories(story_id)
+    await profile_cache.invalidate(*profiles)
+    await remove_media(orphaned)
     return {"ok": True}
 
 @router.post("/{story_id}/languages", response_model=schemas.Story)
+@upload_limit(settings.MAX_AUDIO_UPLOAD_BYTES)
 async def add_language(
     story_id: int,
     language: str = Form(...),
     content: str = Form(...),
     format: str = Form(...),
     audio_file: UploadFile = File(None),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     print(f"Adding language {language} with format {format} to story {story_id}")
-    
-    db_story = db.query(models.Story).filter(models.Story.id == story_id).first()
-    if not db_story:
-        raise HTTPException(status_code=404, detail="Story not found")
-    
-    # Get or create format first
-    db_format = db.query(models.Format).filter(models.Format.type == format).first()
-    if not db_format:
-        db_format = models.Format(type=format)
-        db.add(db_format)
-        db.commit()
-    
+
+    db_story = await get_story_or_404(db, story_id)
+
+    # Resolved in memory; only an unknown format type touches the database
+    db_format = (await reference_data.formats(db, [format]))[format]
+
     # Check if language exists and if it has this format
-    db_language = db.query(models.Language).filter(
-        models.Language.story_id == story_id,
-        models.Language.code == language
-    ).first()
-    
+    db_language = await db.scalar(
+        select(models.Language).where(
+            models.Language.story_id == story_id,
+            models.Language.code == language
+        )
+    )
+
     if db_language:
         # Check if this format already exists for this language
-        existing_content = db.query(models.Content).filter(
-            models.Content.language_id == db_language.id,
-            models.Content.format_id == db_format.id
-        ).first()
-        
+        existing_content = await db.scalar(
+            select(models.Content).where(
+                models.Content.language_id == db_language.id,
+                models.Content.format_id == db_format.id
+            )
+        )
+
         if existing_content:
             raise HTTPException(
-                status_code=400, 
+                status_code=400,
                 detail=f"Format {format} already exists for language {language}"
             )
     else:
-        # Create new language if it doesn't exist
+        # Create new language if it doesn't exist; flushed for its id, committed below
         db_language = models.Language(code=language, story_id=story_id)
         db.add(db_language)
-        db.commit()
-    
+        await db.flush()
+
     # Add format to story if not already present
     if db_format not in db_story.formats:
         db_story.formats.append(db_format)
-    
+
     # Create content
     content_value = content
     if format == 'audio' and audio_file:
-        # Handle audio file upload here
-        # Save file and store path in content_value
-        pass
-    
+        # Streamed to MEDIA_DIR; the content row stores the relative path
+        content_value = await save_audio(audio_file)
+
     db_content = models.Content(
         content=content_value,
         language_id=db_language.id,
         format_id=db_format.id
     )
     db.add(db_content)
-    db.commit()
-    
-    db.refresh(db_story)
-    return db_story
+    await touch_story(db, story_id)
+    try:
+        await db.commit()
+    except Exception:
+        if content_value is not content:
+            await remove_media([content_value])
+        raise
+    await invalidate_stories(story_id)
+    reference_data.add_language_codes([language])
+
+    return await get_story_or_404(db, story_id)
 
 @router.delete("/{story_id}/languages/{language_code}")
-def delete_language(
+async def delete_language(
     story_id: int,
     language_code: str,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     # Find the language
-    db_language = db.query(models.Language).filter(
-        models.Language.story_id == story_id,
-        models.Language.code == language_code
-    ).first()
-    
+    db_language = await db.scalar(
+        select(models.Language).where(
+            models.Language.story_id == story_id,
+            models.Language.code == language_code
+        )
+    )
+
     if not db_language:
         raise HTTPException(status_code=404, detail="Language not found")
-    
-    # Delete the language
-    db.delete(db_language)
-    db.commit()
-    
+
+    # Delete the language; the story's version is bumped in the same commit
+    orphaned = await audio_paths(db, models.Content.language_id == db_language.id)
+    await db.delete(db_language)
+    await touch_story(db, story_id)
+    await db.flush()
+
     # Check if this was the last language for this story
-    remaining_languages = db.query(models.Language).filter(
-        models.Language.story_id == story_id
-    ).count()
-    
+    remaining_languages = await db.scalar(
+        select(func.count()).select_from(models.Language).where(
+            models.Language.story_id == story_id
+        )
+    )
+
+    message = "Language deleted successfully"
+    profiles = []
     if remaining_languages == 0:
         # Delete the story if no languages left
-        db_story = db.query(models.Story).filter(models.Story.id == story_id).first()
+        db_story = await db.get(models.Story, story_id)
         if db_story:
-            db.delete(db_story)
-            db.commit()
-            return {"message": "Story deleted as it had no languages left"}
-    
-    return {"message": "Language deleted successfully"}
-
-@router.delete("/{story_id}/languages/{language_code}/formats/{format_id}")
-def delete_language_format(
+            profiles = await referencing_profiles(db, story_id)
+            await db.delete(db_story)
+            message = "Story deleted as it had no languages left"
+
+    await db.commit()
+    await invalidate_stories(story_id)
+    await profile_cache.invalidate(*profiles)
+    await remove_media(orphaned)
+
+    return {"message": message}
+
+@router.delete("/{story_id}/languages/{language_code}/formats/{format_id}", response_model=schemas.Story)
+async def delete_language_format(
     story_id: int,
     language_code: str,
     format_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     # Find the language
-    db_language = db.query(models.Language).filter(
-        models.Language.story_id == story_id,
-        models.Language.code == language_code
-    ).first()
-    
+    db_language = await db.scalar(
+        select(models.Language).where(
+            models.Language.story_id == story_id,
+            models.Language.code == language_code
+        )
+    )
+
     if not db_language:
         raise HTTPException(status_code=404, detail="Language not found")
-    
+
     # Find and delete the content with specified format
-    db_content = db.query(models.Content).filter(
-        models.Content.language_id == db_language.id,
-        models.Content.format_id == format_id
-    ).first()
-    
+    db_content = await db.scalar(
+        select(models.Content).where(
+            models.Content.language_id == db_language.id,
+            models.Content.format_id == format_id
+        )
+    )
+
     if not db_content:
         raise HTTPException(
-            status_code=404, 
+            status_code=404,
             detail=f"Format {format_id} not found for language {language_code}"
         )
-    
+
     # Delete the content
-    db.delete(db_content)
-    
+    orphaned = await audio_paths(db, models.Content.id == db_content.id)
+    await db.delete(db_content)
+    await db.flush()
+
     # Check if this was the last content for this language
-    remaining_contents = db.query(models.Content).filter(
-        models.Content.language_id == db_language.id
-    ).count()
-    
+    remaining_contents = await db.scalar(
+        select(func.count()).select_from(models.Content).where(
+            models.Content.language_id == db_language.id
+        )
+    )
+
     # If no contents left, delete the language
     if remaining_contents == 0:
-        db.delete(db_language)
-    
-    db.commit()
-    
+        await db.delete(db_language)
+
+    await touch_story(db, story_id)
+    await db.commit()
+    await invalidate_stories(story_id)
+    await remove_media(orphaned)
+
     # Get updated story
-    db_story = db.query(models.Story).filter(models.Story.id == story_id).first()
-    db.refresh(db_story)
-    return db_story
+    return await get_story_or_404(db, story_id)
+
+@router.get("/{story_id}/languages/{language_code}/audio")
+async def get_language_audio(
+    story_id: int,
+    language_code: str,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    audio = await db.scalar(
+        select(models.Content.content)
+        .join(models.Language, models.Content.language_id == models.Language.id)
+        .join(models.Format, models.Content.format_id == models.Format.id)
+        .where(
+            models.Language.story_id == story_id,
+            models.Language.code == language_code,
+            models.Format.type == "audio"
+        )
+    )
+    if not audio:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    path = media_path(audio)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Audio file missing")
+
+    return RangeFileResponse(path, range_header=request.headers.get("range"))
@@ -0,0 +1,18 @@
+import argparse
+from app.core.db_init import migrate_db, seed_db
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Database maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("migrate", help="Upgrade the schema to the latest revision")
+    subcommands.add_parser("seed", help="Insert example data into an empty database")
+    subcommands.add_parser("init", help="migrate, then seed")
+    args = parser.parse_args()
+
+    if args.command in ("migrate", "init"):
+        migrate_db()
+    if args.command in ("seed", "init"):
+        seed_db()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+from PIL import Image, ImageOps
+from sqlalchemy import select
+from app import models
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.media import AVATAR_DIR, AVATAR_SIZES, AVATAR_URL_PREFIX, avatar_files
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+def render_variants(source: str, output_dir: str) -> Dict[str, str]:
+    # Runs in a worker process: decode once, write every size, return filenames
+    data = Path(source).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    output = Path(output_dir)
+    names = {}
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for variant, edge in AVATAR_SIZES.items():
+            name = f"{digest}-{variant}.jpg"
+            target = output / name
+            if not target.exists():
+                resized = image.copy()
+                resized.thumbnail((edge, edge), Image.LANCZOS)
+                partial = target.with_name(name + ".part")
+                resized.save(partial, "JPEG", quality=85, optimize=True, progressive=True)
+                partial.replace(target)
+            names[variant] = name
+
+    return names
+
+async def remove_replaced_avatar(db, photo: Optional[str]):
+    # Call once the profile no longer points at photo. Hashed variants are
+    # shared by profiles that uploaded the same image, so keep them while any
+    # profile still uses one.
+    paths = avatar_files(photo)
+    if not paths:
+        return
+    urls = [AVATAR_URL_PREFIX + path.name for path in paths]
+    if await db.scalar(select(models.Profile.id).where(models.Profile.photo.in_(urls)).limit(1)) is not None:
+        return
+
+    def remove():
+        for path in paths:
+            path.unlink(missing_ok=True)
+    await asyncio.to_thread(remove)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.AVATAR_WORKERS)
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def process_avatar(profile_id: int, source: Path):
+    # Background task: resize off the event loop, then point the profile at the result
+    loop = asyncio.get_running_loop()
+    try:
+        names = await loop.run_in_executor(get_pool(), render_variants, str(source), str(AVATAR_DIR))
+    except Exception:
+        logger.exception("Failed to process avatar for profile %s", profile_id)
+        return
+
+    async with AsyncSessionLocal() as db:
+        profile = await db.get(models.Profile, profile_id)
+        # Only replace the photo if it is still the upload we processed
+        if profile and profile.photo == AVATAR_URL_PREFIX + source.name:
+            profile.photo = AVATAR_URL_PREFIX + names["full"]
+            await db.commit()
+            await get_cache("profiles").invalidate(str(profile_id))
+
+    await asyncio.to_thread(source.unlink, missing_ok=True)
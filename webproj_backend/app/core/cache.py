@@ -0,0 +1,172 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+class CacheBackend:
+    # Stores opaque bytes; implement this to share a cache between workers
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    async def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+class MemoryCacheBackend(CacheBackend):
+    # LRU bounded by entry count and total bytes, entries expire after their ttl.
+    # Counters live in their own LRU so evicting an entry never resets one;
+    # an evicted counter reads as the highest value evicted so far, which
+    # never goes back to a generation a cached entry was stored under.
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or settings.CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.CACHE_MAX_BYTES
+        self._data: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._counters: "OrderedDict[str, int]" = OrderedDict()
+        self._counter_floor = 0
+        self.size = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        if len(value) > self.max_bytes:
+            return
+        self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        self.size += len(value)
+        while len(self._data) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._remove(key)
+
+    async def counter(self, key: str) -> int:
+        if key not in self._counters:
+            return self._counter_floor
+        self._counters.move_to_end(key)
+        return self._counters[key]
+
+    async def incr(self, key: str) -> int:
+        value = self._counters.pop(key, self._counter_floor) + 1
+        self._counters[key] = value
+        while len(self._counters) > self.max_entries:
+            _, evicted = self._counters.popitem(last=False)
+            self._counter_floor = max(self._counter_floor, evicted)
+        return value
+
+    def _remove(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+class RedisCacheBackend(CacheBackend):
+    # Redis evicts by its own maxmemory policy; entries still get the ttl
+    def __init__(self, url: str, prefix: str = "cache:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self._client = redis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        await self._client.set(self._prefix + key, value, ex=ttl or None)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*(self._prefix + key for key in keys))
+
+    async def counter(self, key: str) -> int:
+        return int(await self._client.get(self._prefix + key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(self._prefix + key)
+
+def create_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.CACHE_REDIS_URL)
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCacheBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}")
+
+class Cache:
+    # Entries live under a per-key generation: invalidating a key bumps its
+    # generation, which drops every variant cached for it (e.g. one per query
+    # string) at once. Generations are kept in the backend, so with a shared
+    # backend an invalidation in one worker is seen by all of them.
+
+    def __init__(self, name: str, backend: Optional[CacheBackend] = None, ttl: Optional[int] = None):
+        self.name = name
+        self.backend = backend or create_backend()
+        self.ttl = ttl if ttl is not None else settings.CACHE_TTL_SECONDS
+        self.hits = 0
+        self.misses = 0
+
+    def _generation_key(self, key: str) -> str:
+        return f"{self.name}:{key}:generation"
+
+    async def generation(self, key: str) -> int:
+        return await self.backend.counter(self._generation_key(key))
+
+    async def get_or_set(self, key: str, build: Callable[[], Awaitable[bytes]], variant: str = "") -> bytes:
+        generation = await self.generation(key)
+        entry_key = f"{self.name}:{key}:{generation}:{variant}"
+        value = await self.backend.get(entry_key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await build()
+        # A write that landed while we were building makes this value stale
+        if await self.generation(key) == generation:
+            await self.backend.set(entry_key, value, self.ttl)
+        return value
+
+    async def invalidate(self, *keys: str):
+        for key in keys:
+            await self.backend.incr(self._generation_key(key))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats.update(entries=len(self.backend._data), bytes=self.backend.size, evictions=self.backend.evictions)
+        return stats
+
+caches: Dict[str, Cache] = {}
+
+def get_cache(name: str) -> Cache:
+    if name not in caches:
+        caches[name] = Cache(name)
+    return caches[name]
@@ -13,12 +13,62 @@ class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = None
     BACKEND_URL: str = "http://localhost:8000"  # Adjust this based on your setup
 
+    # Connection pool (per engine, per worker process); ignored for SQLite
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced, -1 disables
+    DB_POOL_PRE_PING: bool = True
+
+    # Response caches: "memory" is per worker, "redis" is shared between workers
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: int = 300  # 0 keeps entries until invalidated or evicted
+    CACHE_MAX_ENTRIES: int = 10000  # per cache, memory backend only
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # per cache, memory backend only
+
+    # Uploaded media (story audio) lives outside the static mount
+    MEDIA_DIR: str = "app/media"
+    MAX_AUDIO_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    MAX_AVATAR_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    AVATAR_WORKERS: int = 2  # processes resizing avatar uploads
+
+    # Per-route request counts and latency histograms at /api/monitoring/metrics
+    METRICS_ENABLED: bool = True
+
+    # Per-request statement count/time as X-DB-Query-* headers and log fields
+    QUERY_PROFILING: bool = False
+    SLOW_QUERY_SECONDS: float = 0.5  # statements slower than this are logged, 0 disables
+
+    # Large list responses skip response_model validation and render through
+    # precompiled TypeAdapters; other JSON responses are rendered with orjson
+    FAST_JSON_RESPONSES: bool = False
+
+    # In-memory formats/language codes are reloaded after this many seconds
+    REFERENCE_DATA_TTL: int = 300
+
+    # Startup. Migrating on boot is idempotent; turn it off when deploys run
+    # `python -m app.cli migrate` once instead. Seeding is always explicit.
+    MIGRATE_ON_STARTUP: bool = True
+    STARTUP_BUDGET_SECONDS: float = 2.0  # lifespan startup time before a warning is logged
+
     @property
     def sync_database_url(self) -> str:
         if self.DATABASE_URL:
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    @property
+    def async_database_url(self) -> str:
+        # Same database, async driver: asyncpg for Postgres, aiosqlite for local/test SQLite
+        url = self.sync_database_url
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        if url.startswith("sqlite://"):
+            return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+        return url
+
     class Config:
         env_file = ".env"
         case_sensitive = True
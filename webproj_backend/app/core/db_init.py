@@ -1,18 +1,16 @@
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, Base, engine
+from app.database import SessionLocal, engine
 from app.models.dialog import Opener, ContinueOption
 from app.models.profile import Profile, Hobby, Note
 from app.models.story import Story, Language, Format, Content
-from pathlib import Path
 
-def init_db():
-    # Create avatars directory and copy default avatar
-    avatar_dir = Path("app/static/avatars")
-    avatar_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-    
+def migrate_db():
+    # Idempotent and cheap once the schema is current, so every worker may run it.
+    # Alembic is imported here so workers started with MIGRATE_ON_STARTUP off never load it.
+    from app.core.migrations import upgrade_database
+    upgrade_database(engine)
+
+def seed_db():
+    # Example data for a fresh database; does nothing once formats exist
     db = SessionLocal()
     try:
         # Check if database is already initialized
@@ -0,0 +1,43 @@
+import hashlib
+import json
+from typing import Optional
+from fastapi import Request, Response
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # Let clients keep the body but revalidate on every use
+    response.headers["Cache-Control"] = "no-cache"
+
+def cached_json_response(request: Request, content: bytes, etag: Optional[str] = None) -> Response:
+    # Without a version-based ETag, hashing the cached body is far cheaper than sending it again
+    etag = etag or make_etag(content)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response = Response(content=content, media_type="application/json")
+    set_etag(response, etag)
+    return response
+
+def cache_variant(*parts) -> str:
+    # Built from the parsed parameters a response depends on, never the raw
+    # query string, so unknown or reordered parameters share one cache entry
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
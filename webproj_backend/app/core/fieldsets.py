@@ -0,0 +1,139 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+from pydantic_core import to_json
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from app import models, schemas
+
+def split_values(values: Iterable[str]) -> List[str]:
+    # Accept both ?fields=a&fields=b and ?fields=a,b
+    parts = []
+    for item in values:
+        for part in item.split(","):
+            part = part.strip()
+            if part and part not in parts:
+                parts.append(part)
+    return parts
+
+class Fieldset:
+    # The parts of a response schema a client may select with ?fields=, and
+    # what each needs from the database: columns go through load_only,
+    # relationships are only loaded (selectinload) when selected and raise if
+    # read otherwise. A selection is a dict of name -> nested selection, None
+    # meaning "all of it".
+
+    def __init__(
+        self,
+        model,
+        schema,
+        relationships: Optional[Dict[str, "Fieldset"]] = None,
+        derived: Optional[Dict[str, Tuple[str, ...]]] = None,
+        expandable: Optional[Tuple[str, ...]] = None,
+    ):
+        self.model = model
+        self.relationships = relationships or {}
+        # Relationships ?expand= may add whole; defaults to all of them
+        self.expandable = expandable if expandable is not None else tuple(self.relationships)
+        # Properties computed on the model, and the columns they read
+        self.derived = derived or {}
+        columns = model.__table__.columns.keys()
+        self.columns = [name for name in schema.model_fields if name in columns]
+        self.names = [
+            name for name in schema.model_fields
+            if name in columns or name in self.relationships or name in self.derived
+        ]
+
+    def parse(self, fields: Iterable[str], expand: Iterable[str] = ()) -> Dict[str, Optional[dict]]:
+        # "id,title,languages.code" -> {"id": None, "title": None, "languages": {"code": None}}
+        selection = {}
+        for path in split_values(fields):
+            self._select(selection, path.split("."), path)
+        for name in split_values(expand):
+            if name not in self.expandable:
+                raise HTTPException(status_code=400, detail=f"Cannot expand: {name}")
+            selection[name] = None
+        return selection
+
+    def selection(self, fields: Iterable[str], expand: Iterable[str] = ()) -> Optional[Dict[str, Optional[dict]]]:
+        # None when no fields were asked for: the endpoint serves its full response
+        selection = self.parse(fields, expand)
+        return selection if split_values(fields) else None
+
+    def _select(self, selection: dict, parts: List[str], path: str):
+        name, rest = parts[0], parts[1:]
+        if name not in self.names or (rest and name not in self.relationships):
+            raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+        if not rest:
+            selection[name] = None
+        elif name not in selection or selection[name] is not None:
+            self.relationships[name]._select(selection.setdefault(name, {}), rest, path)
+
+    def load_options(self, selection: Dict[str, Optional[dict]]) -> list:
+        # The primary key is always loaded, it identifies rows in the session
+        columns = {"id"}
+        for name in selection:
+            if name in self.derived:
+                columns.update(self.derived[name])
+            elif name in self.columns:
+                columns.add(name)
+            elif name in self.relationships:
+                # Many-to-one relationships are loaded through a foreign key on this row
+                columns.update(column.key for column in getattr(self.model, name).property.local_columns)
+
+        options = [load_only(*(getattr(self.model, name) for name in sorted(columns)))]
+        for name, fieldset in self.relationships.items():
+            relationship = getattr(self.model, name)
+            if name in selection:
+                nested = selection[name] or dict.fromkeys(fieldset.names)
+                options.append(selectinload(relationship).options(*fieldset.load_options(nested)))
+            else:
+                options.append(raiseload(relationship))
+        return options
+
+    def dump(self, instance, selection: Dict[str, Optional[dict]]) -> Optional[dict]:
+        if instance is None:
+            return None
+        # id is always returned so partial rows can still be told apart
+        data = {"id": instance.id}
+        for name in self.names:
+            if name not in selection:
+                continue
+            value = getattr(instance, name)
+            fieldset = self.relationships.get(name)
+            if fieldset is not None:
+                nested = selection[name] or dict.fromkeys(fieldset.names)
+                if isinstance(value, list):
+                    value = [fieldset.dump(item, nested) for item in value]
+                else:
+                    value = fieldset.dump(value, nested)
+            data[name] = value
+        return data
+
+    def dump_json(self, instances, selection: Dict[str, Optional[dict]]) -> bytes:
+        if isinstance(instances, list):
+            return to_json([self.dump(instance, selection) for instance in instances])
+        return to_json(self.dump(instances, selection))
+
+CONTENT_FIELDS = Fieldset(models.Content, schemas.Content)
+FORMAT_FIELDS = Fieldset(models.Format, schemas.Format)
+LANGUAGE_FIELDS = Fieldset(models.Language, schemas.Language, relationships={"contents": CONTENT_FIELDS})
+STORY_FIELDS = Fieldset(
+    models.Story,
+    schemas.Story,
+    relationships={"languages": LANGUAGE_FIELDS, "formats": FORMAT_FIELDS},
+)
+
+CONTINUE_OPTION_FIELDS = Fieldset(models.ContinueOption, schemas.ContinueOption)
+OPENER_FIELDS = Fieldset(models.Opener, schemas.Opener, relationships={"continue_options": CONTINUE_OPTION_FIELDS})
+
+PROFILE_FIELDS = Fieldset(
+    models.Profile,
+    schemas.Profile,
+    relationships={
+        "hobbies": Fieldset(models.Hobby, schemas.Hobby),
+        "notes": Fieldset(models.Note, schemas.Note),
+        "opener": OPENER_FIELDS,
+        "story": STORY_FIELDS,
+    },
+    derived={"photo_url": ("photo",), "photo_urls": ("photo",)},
+    expandable=("opener", "story"),
+)
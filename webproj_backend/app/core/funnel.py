@@ -0,0 +1,6 @@
+# Profile checkpoints in funnel order. Stage counts are cumulative: a profile
+# counts towards a stage only if it also reached every earlier one.
+FUNNEL_STAGES = ("answered_opener", "story_discussed", "closed_for_meet", "closed_for_sex")
+
+# profile_funnel keys use 0 for "no opener"/"no story" so they can be part of the primary key
+FUNNEL_KEYS = ("source", "opener_id", "story_id")
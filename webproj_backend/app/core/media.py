@@ -0,0 +1,255 @@
+import mimetypes
+import re
+import uuid
+from email.utils import formatdate
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import anyio
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+# Multipart boundaries, part headers and small form fields around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+def media_root() -> Path:
+    return Path(settings.MEDIA_DIR)
+
+def media_path(relative: str) -> Path:
+    # Content rows store paths relative to MEDIA_DIR; never let one escape it
+    root = media_root().resolve()
+    path = (root / relative).resolve()
+    if root not in path.parents:
+        raise HTTPException(status_code=404, detail="File not found")
+    return path
+
+async def save_upload(upload: UploadFile, destination: Path, max_bytes: Optional[int] = None) -> int:
+    # Streams the upload to disk chunk by chunk without blocking the event loop.
+    # Written to a .part file first so readers never see a half-written file.
+    await run_in_threadpool(destination.parent.mkdir, parents=True, exist_ok=True)
+    partial = destination.with_name(destination.name + ".part")
+    written = 0
+    try:
+        async with await anyio.open_file(partial, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise too_large(max_bytes)
+                await out.write(chunk)
+        await anyio.Path(partial).rename(destination)
+    except BaseException:
+        await anyio.Path(partial).unlink(missing_ok=True)
+        raise
+    return written
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte limit")
+
+def upload_limit(max_bytes: int) -> Callable:
+    # Marks an upload endpoint for UploadLimitRoute
+    def mark(endpoint):
+        endpoint.max_upload_bytes = max_bytes
+        return endpoint
+    return mark
+
+class UploadLimitRoute(APIRoute):
+    # FastAPI parses (and spools to a temp file) the whole multipart body before
+    # the endpoint runs. For endpoints marked with @upload_limit the body is
+    # refused up front when Content-Length is too large, and chunked bodies are
+    # cut off as soon as they pass the limit instead of after the last byte.
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        max_bytes = getattr(self.endpoint, "max_upload_bytes", None)
+        if max_bytes is None:
+            return handler
+        limit = max_bytes + FORM_OVERHEAD_BYTES
+
+        async def limited_handler(request: Request) -> Response:
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > limit:
+                raise too_large(max_bytes)
+
+            receive = request.receive
+            received = 0
+
+            async def counting_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise too_large(max_bytes)
+                return message
+
+            return await handler(Request(request.scope, counting_receive))
+
+        return limited_handler
+
+async def save_audio(upload: UploadFile) -> str:
+    extension = Path(upload.filename or "").suffix.lower() or ".bin"
+    relative = f"audio/{uuid.uuid4().hex}{extension}"
+    await save_upload(upload, media_root() / relative, settings.MAX_AUDIO_UPLOAD_BYTES)
+    return relative
+
+async def remove_media(relatives: Iterable[str]):
+    def remove():
+        for relative in relatives:
+            try:
+                media_path(relative).unlink(missing_ok=True)
+            except (HTTPException, OSError):
+                pass
+    await run_in_threadpool(remove)
+
+AVATAR_DIR = Path("app/static/avatars")
+AVATAR_URL_PREFIX = "/static/avatars/"
+
+# Longest edge in pixels for each variant
+AVATAR_SIZES = {"thumb": 96, "card": 320, "full": 1024}
+
+# Processed avatars are named {sha256 of the source, 32 hex}-{variant}.jpg
+HASHED_AVATAR_NAME = re.compile(r"[0-9a-f]{32}-(thumb|card|full)\.jpg")
+HASHED_AVATAR = re.compile(r"(?P<stem>.*/[0-9a-f]{32})-(?P<variant>thumb|card|full)\.jpg")
+
+# Originals as upload_avatar stores them, until they are processed
+UPLOADED_AVATAR_NAME = re.compile(r"avatar_\d+_[0-9a-f]{8}\.\w+")
+
+def avatar_variant_urls(photo: str) -> Optional[Dict[str, str]]:
+    match = HASHED_AVATAR.fullmatch(photo or "")
+    if not match:
+        return None
+    return {variant: f"{match.group('stem')}-{variant}.jpg" for variant in AVATAR_SIZES}
+
+def avatar_files(photo: Optional[str]) -> List[Path]:
+    # Files behind a photo URL that the app wrote itself: every variant of a
+    # processed avatar, or the stored upload. Anything else (the default
+    # avatar, external URLs, hand-edited paths) is never touched.
+    if not photo or not photo.startswith(AVATAR_URL_PREFIX):
+        return []
+    urls = (avatar_variant_urls(photo) or {"original": photo}).values()
+    names = [url[len(AVATAR_URL_PREFIX):] for url in urls]
+    return [
+        AVATAR_DIR / name for name in names
+        if HASHED_AVATAR_NAME.fullmatch(name) or UPLOADED_AVATAR_NAME.fullmatch(name)
+    ]
+
+class ImmutableStaticFiles(StaticFiles):
+    # Content-hashed files never change under the same name, so clients may cache them forever
+    def __init__(self, *args, immutable_pattern, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_pattern = immutable_pattern
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.immutable_pattern.fullmatch(Path(full_path).name):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    # Returns an inclusive (start, end) for a single byte range, None to send the
+    # whole file; raises ValueError for an unsatisfiable range
+    if not header or not header.startswith("bytes="):
+        return None
+    ranges = header[len("bytes="):].split(",")
+    if len(ranges) != 1:
+        # Multipart ranges aren't supported; a full 200 response is allowed
+        return None
+
+    start, _, end = ranges[0].strip().partition("-")
+    if not (start or end) or (start and not start.isdigit()) or (end and not end.isdigit()):
+        # Malformed ranges are ignored
+        return None
+
+    if not start:
+        # Suffix range: the last N bytes
+        first, last = max(size - int(end), 0), size - 1
+        if int(end) == 0:
+            raise ValueError("Range not satisfiable")
+    else:
+        first = int(start)
+        last = min(int(end), size - 1) if end else size - 1
+
+    if first >= size or last < first:
+        raise ValueError("Range not satisfiable")
+    return first, last
+
+class RangeFileResponse(Response):
+    # Serves a file with HTTP Range support. Uses the ASGI zero-copy send
+    # extension when the server offers it, otherwise streams in chunks.
+
+    def __init__(self, path: Path, range_header: Optional[str] = None, media_type: Optional[str] = None):
+        super().__init__(
+            media_type=media_type or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+        )
+        self.path = path
+        self.range_header = range_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.send_file(scope, send)
+        if self.background is not None:
+            await self.background()
+
+    async def send_file(self, scope: Scope, send: Send):
+        stat = await anyio.Path(self.path).stat()
+        size = stat.st_size
+        headers = [
+            (b"accept-ranges", b"bytes"),
+            (b"content-type", self.media_type.encode()),
+            (b"last-modified", formatdate(stat.st_mtime, usegmt=True).encode()),
+        ]
+
+        try:
+            byte_range = parse_range(self.range_header, size)
+        except ValueError:
+            headers.append((b"content-range", f"bytes */{size}".encode()))
+            await send({"type": "http.response.start", "status": 416, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if byte_range is None:
+            status, start, end = 200, 0, size - 1
+        else:
+            status, (start, end) = 206, byte_range
+            headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+        length = max(end - start + 1, 0)
+        headers.append((b"content-length", str(length).encode()))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope.get("method") == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            file = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": length,
+                })
+            finally:
+                await run_in_threadpool(file.close)
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
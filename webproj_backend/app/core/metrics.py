@@ -0,0 +1,114 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds in seconds, Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Requests that matched no API route (404s, static files) share one label,
+# so scans for random paths can't blow up the number of series
+UNMATCHED_ROUTE = "<unmatched>"
+
+class RouteMetrics:
+    # Per worker process request counts and latency histograms, keyed by the
+    # route template (/api/profiles/{profile_id}), not the raw path
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        # (method, route) -> per-bucket counts (last one is +Inf), sum of seconds
+        self.latency: Dict[Tuple[str, str], List] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = [[0] * (len(self.buckets) + 1), 0.0]
+        histogram[0][bisect_left(self.buckets, seconds)] += 1
+        histogram[1] += seconds
+
+    def render(self) -> str:
+        # Prometheus text exposition format 0.0.4
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{escape(route)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route template and method.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for (method, route), (counts, total) in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        self.requests.clear()
+        self.latency.clear()
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def route_template(scope: Scope) -> str:
+    # FastAPI stores the matched route in the scope while routing
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    template = getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ROUTE)
+
+    # Newer FastAPI versions keep routes of included routers relative to the
+    # router ("/" for /api/profiles/). The route then matches only the tail of
+    # the request path; what precedes it is the literal include prefix.
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return template
+    start = path.rfind("/")
+    while start > 0:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.rfind("/", 0, start)
+    return template
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no request/response objects, one clock read on each
+    # side and a couple of dict updates per request
+
+    def __init__(self, app: ASGIApp, metrics: RouteMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.observe(scope["method"], route_template(scope), status, time.perf_counter() - start)
+
+# Per worker process; each worker exposes its own numbers
+route_metrics = RouteMetrics()
@@ -0,0 +1,41 @@
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Revision matching the schema Base.metadata.create_all used to build
+BASELINE_REVISION = "0001"
+
+# pg_advisory_xact_lock key; any constant shared by every worker will do
+MIGRATION_LOCK_ID = 724_015
+
+def alembic_config(connection=None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+def is_up_to_date(connection, config: Config) -> bool:
+    current = set(MigrationContext.configure(connection).get_current_heads())
+    return current == set(ScriptDirectory.from_config(config).get_heads())
+
+def upgrade_database(engine: Engine, revision: str = "head"):
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Workers booting together migrate one at a time; the rest find nothing to do
+            connection.exec_driver_sql(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_ID})")
+        config = alembic_config(connection)
+        tables = set(inspect(connection).get_table_names())
+        # Databases created before migrations existed: adopt them at the baseline
+        if "alembic_version" not in tables and "stories" in tables:
+            command.stamp(config, BASELINE_REVISION)
+        elif revision == "head" and is_up_to_date(connection, config):
+            return
+        command.upgrade(config, revision)
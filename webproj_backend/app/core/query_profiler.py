@@ -0,0 +1,114 @@
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+class QueryStats:
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.count = 0
+        self.seconds = 0.0
+
+# The stats object is shared by reference, so statements run in SQLAlchemy's
+# greenlets or the threadpool still add to the request that issued them
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+MAX_LOGGED_STATEMENT = 2000
+
+def redact_statement(statement: str) -> str:
+    # Bound values never appear in the SQL, but text() queries may inline literals
+    statement = NUMBER_LITERAL.sub("?", STRING_LITERAL.sub("'?'", statement))
+    statement = " ".join(statement.split())
+    return statement[:MAX_LOGGED_STATEMENT]
+
+def redact_parameters(parameters, executemany: bool) -> str:
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: ?" for key in parameters) + "}"
+    if parameters:
+        return f"<{len(parameters)} parameters>"
+    return "<none>"
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if settings.SLOW_QUERY_SECONDS > 0 and elapsed >= settings.SLOW_QUERY_SECONDS:
+        slow_query_logger.warning(
+            "Slow query %.3fs on %s: %s params=%s",
+            elapsed,
+            stats.path if stats is not None else "<no request>",
+            redact_statement(statement),
+            redact_parameters(parameters, executemany),
+        )
+
+def handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    start_times = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if start_times:
+        start_times.pop()
+
+def install_query_profiler(engine: Engine):
+    # Takes a sync Engine; for an AsyncEngine pass async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+class QueryProfilerMiddleware:
+    # Tracks statements per request so slow queries can name their route. With
+    # expose, also adds the count and total time to each response
+    # (X-DB-Query-Count, X-DB-Query-Time in ms) and to a per-request log line.
+
+    def __init__(self, app: ASGIApp, expose: bool = False):
+        self.app = app
+        self.expose = expose
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope["path"])
+        token = current_stats.set(stats)
+        if not self.expose:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_stats.reset(token)
+            return
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-query-time", f"{stats.seconds * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_stats.reset(token)
+            logger.info(
+                "%s %s queries=%d db_ms=%.2f",
+                scope["method"], scope["path"], stats.count, stats.seconds * 1000,
+                extra={"db_query_count": stats.count, "db_query_ms": round(stats.seconds * 1000, 2)},
+            )
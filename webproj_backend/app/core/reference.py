@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Set
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app import models
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+
+DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+class ReferenceData:
+    # Formats and language codes change rarely, so each worker keeps them in
+    # memory: story writes resolve a format without a SELECT. Unknown format
+    # types fall through to the database, which also picks up rows other
+    # workers created; the whole set is reloaded every REFERENCE_DATA_TTL.
+
+    def __init__(self):
+        self.format_ids: Dict[str, int] = {}
+        self.language_codes: Set[str] = set()
+        self.loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > settings.REFERENCE_DATA_TTL
+
+    async def load(self, db: AsyncSession):
+        rows = (await db.execute(select(models.Format.type, models.Format.id))).all()
+        codes = await db.scalars(select(models.Language.code).distinct())
+        self.format_ids = dict(rows)
+        self.language_codes = set(codes.all())
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self):
+        async with AsyncSessionLocal() as db:
+            await self.load(db)
+
+    async def ensure_loaded(self):
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    await self.refresh()
+
+    async def create_formats(self, types: Set[str]):
+        # Own short transaction: formats are shared reference data, and ids cached
+        # here must never belong to a request transaction that later rolls back.
+        # ON CONFLICT makes concurrent creation from several workers safe.
+        async with AsyncSessionLocal() as db:
+            dialect = db.get_bind().dialect.name
+            insert = DIALECT_INSERTS.get(dialect)
+            if insert is None:
+                raise NotImplementedError(f"Format get-or-create is not available on {dialect}")
+
+            await db.execute(
+                insert(models.Format)
+                .values([{"type": format_type} for format_type in sorted(types)])
+                .on_conflict_do_nothing(index_elements=["type"])
+            )
+            rows = await db.execute(
+                select(models.Format.type, models.Format.id).where(models.Format.type.in_(types))
+            )
+            await db.commit()
+        self.format_ids.update(rows.all())
+
+    async def format_ids_for(self, types: Iterable[str]) -> Dict[str, int]:
+        await self.ensure_loaded()
+        types = set(types)
+        missing = types - self.format_ids.keys()
+        if missing:
+            await self.create_formats(missing)
+        return {format_type: self.format_ids[format_type] for format_type in types}
+
+    async def formats(self, db: AsyncSession, types: Iterable[str]) -> Dict[str, models.Format]:
+        # Format instances attached to db without loading them, for use in relationships
+        formats = {}
+        for format_type, format_id in (await self.format_ids_for(types)).items():
+            db_format = models.Format(id=format_id, type=format_type)
+            make_transient_to_detached(db_format)
+            formats[format_type] = await db.merge(db_format, load=False)
+        return formats
+
+    def add_language_codes(self, codes: Iterable[str]):
+        self.language_codes.update(codes)
+
+    def known_language_codes(self) -> List[str]:
+        return sorted(self.language_codes)
+
+# Per worker process; loaded lazily on first use
+reference_data = ReferenceData()
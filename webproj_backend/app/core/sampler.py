@@ -0,0 +1,79 @@
+import random
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+from app.core.cache import Cache, get_cache
+
+T = TypeVar("T")
+
+class AliasTable(Generic[T]):
+    # Vose's alias method: O(n) build, O(1) per draw
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        pairs = [(item, float(weight)) for item, weight in zip(items, weights) if weight > 0]
+        if not pairs:
+            raise ValueError("At least one item with a positive weight is required")
+
+        self.items = [item for item, _ in pairs]
+        count = len(pairs)
+        total = sum(weight for _, weight in pairs)
+        scaled = [weight * count / total for _, weight in pairs]
+
+        self.probability = [0.0] * count
+        self.alias = [0] * count
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def draw(self, rng: random.Random = random) -> T:
+        column = int(rng.random() * len(self.items))
+        if rng.random() < self.probability[column]:
+            return self.items[column]
+        return self.items[self.alias[column]]
+
+    def sample(self, n: int, rng: random.Random = random) -> List[T]:
+        return [self.draw(rng) for _ in range(n)]
+
+class AliasTableCache:
+    # Tables are built lazily in each worker and stored with the generation
+    # their key had in the shared cache backend. invalidate() bumps that
+    # generation, so a write handled by any worker makes every worker rebuild
+    # on its next draw.
+
+    def __init__(self, generations: Cache):
+        self.generations = generations
+        self._tables: Dict[Hashable, Tuple[int, Optional[AliasTable]]] = {}
+
+    @staticmethod
+    def _name(key: Hashable) -> str:
+        return ":".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+    async def get(self, key: Hashable, build: Callable) -> Optional[AliasTable]:
+        generation = await self.generations.generation(self._name(key))
+        cached = self._tables.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        items, weights = await build()
+        table = AliasTable(items, weights) if any(w > 0 for w in weights) else None
+        # Don't cache a table that was invalidated while it was being built
+        if await self.generations.generation(self._name(key)) == generation:
+            self._tables[key] = (generation, table)
+        return table
+
+    async def invalidate(self, *keys: Hashable):
+        for key in keys:
+            self._tables.pop(key, None)
+        await self.generations.invalidate(*(self._name(key) for key in keys))
+
+# Keys are ("options", opener_id) and ("context", context); tables are per
+# worker process, their generations live in the "sampler" cache's backend
+sampler_cache = AliasTableCache(get_cache("sampler"))
@@ -0,0 +1,94 @@
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+HIGHLIGHT_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2"
+
+# story_search_config(), contents.search_vector and the FTS5 tables are
+# installed by alembic revision 0002
+POSTGRES_SEARCH = text(f"""
+    WITH query AS (
+        SELECT websearch_to_tsquery(story_search_config(:language), :q) AS q,
+               websearch_to_tsquery('simple', :q) AS title_q
+    ),
+    matches AS (
+        SELECT c.id FROM contents c, query WHERE c.search_vector @@ query.q
+        UNION
+        SELECT c.id
+        FROM stories s
+        JOIN languages l ON l.story_id = s.id
+        JOIN contents c ON c.language_id = l.id, query
+        WHERE to_tsvector('simple', s.title) @@ query.title_q AND c.search_vector IS NOT NULL
+    ),
+    ranked AS (
+        SELECT c.id AS content_id, s.id AS story_id, l.code AS language,
+               ts_rank_cd(c.search_vector, query.q)
+               + CASE WHEN to_tsvector('simple', s.title) @@ query.title_q THEN 1.0 ELSE 0.0 END AS rank
+        FROM matches m
+        JOIN contents c ON c.id = m.id
+        JOIN languages l ON l.id = c.language_id
+        JOIN stories s ON s.id = l.story_id, query
+        WHERE (CAST(:language AS text) IS NULL OR l.code = :language)
+        ORDER BY rank DESC, c.id
+        LIMIT :limit OFFSET :offset
+    )
+    -- Highlighting is the expensive part, so only the requested page is highlighted
+    SELECT r.story_id, s.title, r.language, r.rank,
+           ts_headline('simple', s.title, query.title_q, 'StartSel=<mark>, StopSel=</mark>, HighlightAll=true') AS title_highlight,
+           ts_headline(story_search_config(r.language), c.content, query.q, '{HIGHLIGHT_OPTIONS}') AS snippet
+    FROM ranked r
+    JOIN contents c ON c.id = r.content_id
+    JOIN stories s ON s.id = r.story_id, query
+    ORDER BY r.rank DESC, r.content_id
+""")
+
+SQLITE_SEARCH = text("""
+    WITH content_matches AS (
+        SELECT rowid AS content_id, -bm25(contents_fts) AS rank,
+               snippet(contents_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet
+        FROM contents_fts WHERE contents_fts MATCH :q
+    ),
+    title_matches AS (
+        SELECT rowid AS story_id, highlight(stories_fts, 0, '<mark>', '</mark>') AS title_highlight
+        FROM stories_fts WHERE stories_fts MATCH :q
+    )
+    SELECT s.id AS story_id, s.title, l.code AS language,
+           coalesce(m.rank, 0.0) + CASE WHEN t.story_id IS NOT NULL THEN 1.0 ELSE 0.0 END AS rank,
+           coalesce(t.title_highlight, s.title) AS title_highlight,
+           coalesce(m.snippet, substr(c.content, 1, 200)) AS snippet
+    FROM contents c
+    JOIN formats f ON f.id = c.format_id AND f.type = 'text'
+    JOIN languages l ON l.id = c.language_id
+    JOIN stories s ON s.id = l.story_id
+    LEFT JOIN content_matches m ON m.content_id = c.id
+    LEFT JOIN title_matches t ON t.story_id = s.id
+    WHERE (m.content_id IS NOT NULL OR t.story_id IS NOT NULL)
+      AND (:language IS NULL OR l.code = :language)
+    ORDER BY rank DESC, c.id
+    LIMIT :limit OFFSET :offset
+""")
+
+def sqlite_match_query(q: str) -> str:
+    # Quote every term so user input can't trip FTS5 query syntax; terms are ANDed
+    terms = [term.replace('"', '""') for term in q.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+async def search_stories(
+    db: AsyncSession,
+    q: str,
+    language: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[dict]:
+    dialect = db.get_bind().dialect.name
+    params = {"q": q, "language": language, "limit": limit, "offset": offset}
+    if dialect == "postgresql":
+        statement = POSTGRES_SEARCH
+    elif dialect == "sqlite":
+        statement = SQLITE_SEARCH
+        params["q"] = sqlite_match_query(q)
+    else:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}")
+
+    result = await db.execute(statement, params)
+    return [dict(row) for row in result.mappings().all()]
@@ -0,0 +1,30 @@
+from typing import Any, Optional
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+def json_response(content: bytes, sub_response: Optional[Response] = None) -> Response:
+    response = Response(content=content, media_type="application/json")
+    if sub_response is not None:
+        # FastAPI only merges headers set on the injected Response into
+        # responses it builds itself, so carry cursor/ETag headers over
+        response.raw_headers.extend(
+            (name, value) for name, value in sub_response.raw_headers if name != b"content-length"
+        )
+    return response
+
+class ResponseAdapter:
+    # Precompiled validator/serializer for a response type. Validates ORM objects
+    # in one pass and writes JSON bytes from pydantic-core, skipping FastAPI's
+    # response_model round trip (validate, dump to dicts, json.dumps).
+
+    def __init__(self, response_type: Any):
+        self.adapter = TypeAdapter(response_type)
+
+    def validate(self, objects):
+        return self.adapter.validate_python(objects, from_attributes=True)
+
+    def dump_json(self, objects) -> bytes:
+        return self.adapter.dump_json(self.validate(objects))
+
+    def response(self, objects, sub_response: Optional[Response] = None) -> Response:
+        return json_response(self.dump_json(objects), sub_response)
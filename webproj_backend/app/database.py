@@ -1,12 +1,31 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import engine_options
+from app.core.query_profiler import install_query_profiler
 
 # Use sync_database_url instead of DATABASE_URL
-engine = create_engine(settings.sync_database_url)
+engine = create_engine(settings.sync_database_url, **engine_options(settings.sync_database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request handlers use the async engine so DB round-trips don't hold a threadpool thread
+async_engine = create_async_engine(
+    settings.async_database_url,
+    **engine_options(settings.async_database_url, is_async=True)
+)
+# Per-request query counts/timings and the slow-query log
+install_query_profiler(engine)
+install_query_profiler(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -1,20 +1,53 @@
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.core.config import settings
-from app.core.db_init import init_db
-from app.api.endpoints import dialogs_router, profiles_router, stories_router
-from fastapi.staticfiles import StaticFiles
+from app.core.db_init import migrate_db
+from app.database import async_engine
+from app.api.endpoints import (
+    dialogs_router, profiles_router, stories_router, monitoring_router, analytics_router
+)
+from app.core.avatars import shutdown_pool as shutdown_avatar_pool
+from app.core.media import HASHED_AVATAR_NAME, ImmutableStaticFiles
+from app.core.metrics import MetricsMiddleware, route_metrics
+from app.core.query_profiler import QueryProfilerMiddleware
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database at import time; startup work happens here.
+    # Reference data loads on first use, so with MIGRATE_ON_STARTUP off a
+    # worker starts serving without a database round trip.
+    started = time.perf_counter()
+    if settings.MIGRATE_ON_STARTUP:
+        await run_in_threadpool(migrate_db)
+
+    app.state.startup_seconds = time.perf_counter() - started
+    if app.state.startup_seconds > settings.STARTUP_BUDGET_SECONDS:
+        logger.warning(
+            "Startup took %.2fs, over the %.2fs budget",
+            app.state.startup_seconds, settings.STARTUP_BUDGET_SECONDS
+        )
+
+    yield
+
+    shutdown_avatar_pool()
+    await async_engine.dispose()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
 )
 
-# Initialize database
-init_db()
-
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -22,15 +55,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "X-DB-Query-Count", "X-DB-Query-Time"],
 )
 
+app.add_middleware(QueryProfilerMiddleware, expose=settings.QUERY_PROFILING)
+
+# Added last so it wraps everything else and times the whole request
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=route_metrics)
+
 # Include routers
 app.include_router(dialogs_router, prefix=f"{settings.API_V1_STR}/openers", tags=["dialogs"])
 app.include_router(profiles_router, prefix=f"{settings.API_V1_STR}/profiles", tags=["profiles"])
 app.include_router(stories_router, prefix=f"{settings.API_V1_STR}/stories", tags=["stories"])
+app.include_router(monitoring_router, prefix=f"{settings.API_V1_STR}/monitoring", tags=["monitoring"])
+app.include_router(analytics_router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"])
 
 # Add after app initialization
-app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
+app.mount(
+    "/static",
+    ImmutableStaticFiles(directory=Path(__file__).parent / "static", immutable_pattern=HASHED_AVATAR_NAME),
+    name="static"
+)
 
 @app.get("/")
 async def root():
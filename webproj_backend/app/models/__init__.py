@@ -1,3 +1,3 @@
 from app.models.dialog import Opener, ContinueOption
-from app.models.profile import Profile, Hobby, Note
-from app.models.story import Story, Language, Format, Content
+from app.models.profile import Profile, Hobby, Note, ProfileFunnel
+from app.models.story import Story, StoryListVersion, Language, Format, Content
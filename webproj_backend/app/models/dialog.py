@@ -17,6 +17,6 @@ class ContinueOption(Base):
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String, nullable=False)
     weight = Column(Float, nullable=False, default=1.0)
-    opener_id = Column(Integer, ForeignKey("openers.id"), nullable=False)
+    opener_id = Column(Integer, ForeignKey("openers.id"), nullable=False, index=True)
     
     opener = relationship("Opener", back_populates="continue_options")
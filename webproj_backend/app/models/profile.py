@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, inspect
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.core.config import settings
+from app.core.media import AVATAR_SIZES, avatar_variant_urls
 
 class Profile(Base):
     __tablename__ = "profiles"
@@ -30,18 +31,38 @@ class Profile(Base):
     opener = relationship("Opener", backref="profiles")
     story = relationship("Story", backref="profiles")
 
+    @staticmethod
+    def _absolute_url(path):
+        if path.startswith('http'):
+            return path
+        return f"{settings.BACKEND_URL}{path}"
+
     @property
     def photo_url(self):
-        if self.photo.startswith('http'):
-            return self.photo
-        return f"{settings.BACKEND_URL}{self.photo}"
+        return self._absolute_url(self.photo)
+
+    @property
+    def photo_urls(self):
+        # thumb/card/full once the upload has been processed, else the original for every size
+        variants = avatar_variant_urls(self.photo) or dict.fromkeys(AVATAR_SIZES, self.photo)
+        return {variant: self._absolute_url(path) for variant, path in variants.items()}
+
+    # The opener/story when the query loaded them (?expand=), else None. Reading
+    # these never triggers a load, so unexpanded queries can raiseload both.
+    @property
+    def expanded_opener(self):
+        return None if "opener" in inspect(self).unloaded else self.opener
+
+    @property
+    def expanded_story(self):
+        return None if "story" in inspect(self).unloaded else self.story
 
 class Hobby(Base):
     __tablename__ = "hobbies"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
+    profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False, index=True)
     
     profile = relationship("Profile", back_populates="hobbies")
 
@@ -51,6 +72,20 @@ class Note(Base):
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String, nullable=False)
     value = Column(String, nullable=False)
-    profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
+    profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False, index=True)
     
     profile = relationship("Profile", back_populates="notes")
+
+class ProfileFunnel(Base):
+    # Checkpoint counts per source/opener/story, maintained by triggers on
+    # profiles (installed by alembic revision 0004); the app only reads it
+    __tablename__ = "profile_funnel"
+
+    source = Column(String, primary_key=True)
+    opener_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 when no opener
+    story_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 when no story
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+    answered_opener = Column(Integer, nullable=False, default=0, server_default="0")
+    story_discussed = Column(Integer, nullable=False, default=0, server_default="0")
+    closed_for_meet = Column(Integer, nullable=False, default=0, server_default="0")
+    closed_for_sex = Column(Integer, nullable=False, default=0, server_default="0")
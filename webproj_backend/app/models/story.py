@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -15,12 +15,26 @@ class Story(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
+    # Bumped on every change to the story or its languages/contents; used for ETags
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     languages = relationship("Language", back_populates="story", cascade="all, delete-orphan")
     formats = relationship("Format", secondary=story_formats, back_populates="stories")
 
+class StoryListVersion(Base):
+    # Single row bumped in the same transaction as every story insert, update
+    # and delete; the story list ETag is built from it
+    __tablename__ = "story_list_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
 class Language(Base):
     __tablename__ = "languages"
+    __table_args__ = (
+        # One row per language per story; also serves lookups by story_id
+        Index("uq_languages_story_id_code", "story_id", "code", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     code = Column(String(2), nullable=False)  # e.g., 'en', 'es'
@@ -33,13 +47,17 @@ class Format(Base):
     __tablename__ = "formats"
 
     id = Column(Integer, primary_key=True, index=True)
-    type = Column(String, nullable=False)  # 'text' or 'audio'
+    type = Column(String, nullable=False, unique=True, index=True)  # 'text' or 'audio'
     
     stories = relationship("Story", secondary=story_formats, back_populates="formats")
     contents = relationship("Content", back_populates="format", cascade="all, delete-orphan")
 
 class Content(Base):
     __tablename__ = "contents"
+    __table_args__ = (
+        # One content per format per language; also serves lookups by language_id
+        Index("uq_contents_language_id_format_id", "language_id", "format_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)  # For audio, this will be the file path
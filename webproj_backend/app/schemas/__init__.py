@@ -1,3 +1,11 @@
 from app.schemas.dialog import Opener, OpenerCreate, ContinueOption, ContinueOptionCreate
-from app.schemas.profile import Profile, ProfileCreate, ProfileUpdate, Hobby, HobbyCreate, Note, NoteCreate
-from app.schemas.story import Story, StoryCreate, StoryUpdate, Language, LanguageCreate, Format, Content
+from app.schemas.profile import (
+    Profile, ProfileCreate, ProfileUpdate, ProfileImport, ProfileImportResult, ImportRowError,
+    ProfileCheckpoints, ProfileBulkCheckpointUpdate, ProfileBulkUpdateResult,
+    Hobby, HobbyCreate, Note, NoteCreate
+)
+from app.schemas.story import (
+    Story, StoryCreate, StoryUpdate, StoryIngest, StoryBulkResult, StorySearchHit,
+    Language, LanguageCreate, Format, Content
+)
+from app.schemas.analytics import FunnelRow
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class FunnelRow(BaseModel):
+    # Group columns are only set when grouped by; None also means "no opener/story"
+    source: Optional[str] = None
+    opener_id: Optional[int] = None
+    story_id: Optional[int] = None
+    # Cumulative: each stage counts profiles that also reached every earlier one
+    total: int
+    answered_opener: int
+    story_discussed: int
+    closed_for_meet: int
+    closed_for_sex: int
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import date
+from app.schemas.dialog import Opener
+from app.schemas.story import Story
 
 class HobbyBase(BaseModel):
     name: str
@@ -46,6 +48,19 @@ class ProfileBase(BaseModel):
 class ProfileCreate(ProfileBase):
     pass
 
+class ProfileImport(ProfileCreate):
+    hobbies: List[HobbyCreate] = []
+    notes: List[NoteCreate] = []
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+class ProfileImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []
+
 class ProfileUpdate(BaseModel):
     name: Optional[str] = None
     age: Optional[int] = None
@@ -60,11 +75,30 @@ class ProfileUpdate(BaseModel):
     closed_for_meet: Optional[bool] = None
     closed_for_sex: Optional[bool] = None
 
+class ProfileCheckpoints(BaseModel):
+    answered_opener: Optional[bool] = None
+    story_discussed: Optional[bool] = None
+    closed_for_meet: Optional[bool] = None
+    closed_for_sex: Optional[bool] = None
+
+class ProfileBulkCheckpointUpdate(BaseModel):
+    # Profiles to update; query filters narrow (or, without ids, select) the set
+    ids: Optional[List[int]] = Field(None, min_length=1)
+    checkpoints: ProfileCheckpoints
+
+class ProfileBulkUpdateResult(BaseModel):
+    updated: int
+    ids: List[int]
+
 class Profile(ProfileBase):
     id: int
     hobbies: List[Hobby] = []
     notes: List[Note] = []
     photo_url: str
+    photo_urls: Dict[str, str] = {}
+    # Only populated when requested via ?expand=opener,story
+    opener: Optional[Opener] = Field(None, validation_alias="expanded_opener")
+    story: Optional[Story] = Field(None, validation_alias="expanded_story")
 
     class Config:
         from_attributes = True
\ No newline at end of file
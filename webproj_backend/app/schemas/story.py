@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
 class ContentBase(BaseModel):
@@ -52,6 +52,13 @@ class StoryCreate(StoryBase):
 class StoryUpdate(StoryBase):
     pass
 
+class StoryIngest(StoryBase):
+    languages: List[LanguageCreate] = Field(min_length=1)
+
+class StoryBulkResult(BaseModel):
+    created: int
+    ids: List[int]
+
 class Story(StoryBase):
     id: int
     languages: List[Language]
@@ -59,3 +66,11 @@ class Story(StoryBase):
 
     class Config:
         from_attributes = True
+
+class StorySearchHit(BaseModel):
+    story_id: int
+    title: str
+    title_highlight: str
+    language: str
+    rank: float
+    snippet: str
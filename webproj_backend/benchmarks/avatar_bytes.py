@@ -0,0 +1,106 @@
+"""Bytes a profile list page transfers for avatars, original uploads vs resized.
+
+Creates --profiles profiles under their own source and uploads a photo to
+each: files from --images (cycled), or generated --width x --height JPEGs.
+The bytes sent are recorded as the "before" figure, since the list used to
+serve the raw upload on every card. Once the background resize has replaced
+every photo, one list page is fetched and each photo_urls variant is
+downloaded for the "after" figures, e.g.:
+
+    python -m benchmarks.avatar_bytes --url http://localhost:8000 --profiles 100
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+
+def generated_photo(width: int, height: int, seed: int) -> bytes:
+    # A gradient under noise compresses roughly like a camera photo; flat
+    # colours would flatter the resize
+    noise = [Image.effect_noise((width, height), 40 + seed % 20) for _ in range(3)]
+    gradient = Image.linear_gradient("L").resize((width, height))
+    channels = [Image.blend(channel, gradient, 0.5) for channel in noise]
+    buffer = io.BytesIO()
+    Image.merge("RGB", channels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def photos(args):
+    if args.images:
+        files = sorted(path for path in Path(args.images).iterdir() if path.is_file())
+        return itertools.cycle([(path.name, path.read_bytes()) for path in files])
+    return ((f"photo-{i}.jpg", generated_photo(args.width, args.height, i)) for i in itertools.count())
+
+
+async def page_bytes(client: httpx.AsyncClient, urls) -> int:
+    total = 0
+    for url in set(urls):
+        response = await client.get(url)
+        response.raise_for_status()
+        total += len(response.content)
+    return total
+
+
+async def wait_until_resized(client: httpx.AsyncClient, source: str, count: int, timeout: float) -> list:
+    deadline = time.perf_counter() + timeout
+    while True:
+        response = await client.get("/api/profiles/", params={"source": source, "limit": count})
+        response.raise_for_status()
+        profiles = response.json()
+        # Processed photos are served as thumb/card/full variants of one hashed name
+        if all(p["photo_urls"]["thumb"] != p["photo_urls"]["full"] for p in profiles):
+            return profiles
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Avatars were not resized in time")
+        await asyncio.sleep(0.5)
+
+
+async def run(args) -> dict:
+    source = f"avatar-bytes-{uuid.uuid4().hex[:8]}"
+    original_bytes = 0
+    async with httpx.AsyncClient(base_url=args.url, timeout=60.0) as client:
+        for i, (name, data) in zip(range(args.profiles), photos(args)):
+            response = await client.post(
+                "/api/profiles/", json={"name": f"Avatar bytes {i}", "age": 30, "source": source}
+            )
+            response.raise_for_status()
+            response = await client.post(
+                f"/api/profiles/{response.json()['id']}/avatar", files={"file": (name, data, "image/jpeg")}
+            )
+            response.raise_for_status()
+            original_bytes += len(data)
+
+        profiles = await wait_until_resized(client, source, args.profiles, args.timeout)
+        result = {
+            "profiles": len(profiles),
+            "source": source,
+            "original_bytes": original_bytes,
+        }
+        for variant in sorted(profiles[0]["photo_urls"]):
+            result[f"{variant}_bytes"] = await page_bytes(client, [p["photo_urls"][variant] for p in profiles])
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--profiles", type=int, default=100)
+    parser.add_argument("--images", help="Directory of photos to upload instead of generated ones")
+    parser.add_argument("--width", type=int, default=3024)
+    parser.add_argument("--height", type=int, default=4032)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for the resize")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
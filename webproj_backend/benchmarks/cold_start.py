@@ -0,0 +1,82 @@
+"""Cold-start time of a worker: import, then boot until the first response.
+
+Times `import app.main` in fresh interpreters, then starts uvicorn --runs
+times and measures until GET / answers. Exits non-zero if the median boot
+exceeds --budget (defaults to STARTUP_BUDGET_SECONDS), e.g.:
+
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.core.config import settings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_import() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True)
+    return time.perf_counter() - start
+
+
+def time_boot(timeout: float) -> dict:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        while True:
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"Server did not answer within {timeout}s")
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with {server.returncode}")
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).raise_for_status()
+                break
+            except httpx.HTTPError:
+                time.sleep(0.02)
+        first_response = time.perf_counter() - start
+        reported = httpx.get(f"http://127.0.0.1:{port}{settings.API_V1_STR}/monitoring/startup").json()
+        return {"first_response_s": first_response, "app_reported_s": reported["seconds"]}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=settings.STARTUP_BUDGET_SECONDS)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    imports = [time_import() for _ in range(args.runs)]
+    boots = [time_boot(args.timeout) for _ in range(args.runs)]
+    median_boot = statistics.median(boot["first_response_s"] for boot in boots)
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import_median_s": round(statistics.median(imports), 3),
+        "boot_median_s": round(median_boot, 3),
+        "app_reported_median_s": round(statistics.median(boot["app_reported_s"] for boot in boots), 3),
+        "budget_s": args.budget,
+    }))
+    if median_boot > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
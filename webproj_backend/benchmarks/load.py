@@ -0,0 +1,75 @@
+"""Concurrency load test against a running API server.
+
+Run it against the same database before and after a change to compare
+throughput, e.g.:
+
+    python -m benchmarks.load --url http://localhost:8000 --path /api/profiles/ -c 200 -n 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(url: str, path: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", help="Route to hit; may be repeated")
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    for path in args.path or ["/api/profiles/", "/api/stories/", "/api/openers/"]:
+        result = asyncio.run(run(args.url, path, args.concurrency, args.requests))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-request cost of MetricsMiddleware.
+
+Calls a minimal FastAPI app directly over ASGI (no server, no HTTP client)
+with and without the middleware, interleaving rounds so drift affects both
+equally, and reports the difference per request in microseconds, e.g.:
+
+    python -m benchmarks.metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware, RouteMetrics
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, metrics=RouteMetrics())
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(),
+            "root_path": "", "query_string": b"", "headers": [], "server": ("bench", 80), "client": ("bench", 1),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def run(requests: int, rounds: int) -> dict:
+    plain, instrumented = build_app(False), build_app(True)
+    # Warm up both (route compilation, first-call caches)
+    await drive(plain, 500)
+    await drive(instrumented, 500)
+
+    plain_times, instrumented_times = [], []
+    for _ in range(rounds):
+        plain_times.append(await drive(plain, requests))
+        instrumented_times.append(await drive(instrumented, requests))
+
+    metrics = RouteMetrics()
+    start = time.perf_counter()
+    for i in range(requests):
+        metrics.observe("GET", "/items/{item_id}", 200, i * 1e-5)
+    observe = (time.perf_counter() - start) / requests
+
+    plain_us = statistics.median(plain_times) * 1e6
+    instrumented_us = statistics.median(instrumented_times) * 1e6
+    return {
+        "requests_per_round": requests,
+        "rounds": rounds,
+        "plain_us_per_request": round(plain_us, 2),
+        "instrumented_us_per_request": round(instrumented_us, 2),
+        "overhead_us_per_request": round(instrumented_us - plain_us, 2),
+        "observe_us": round(observe * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.requests, args.rounds))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Serialization time and allocations for large list responses.
+
+Builds --rows in-memory Profile and Story ORM objects (no database) and
+renders them three ways:
+
+- response_model: what FastAPI does for a response_model on pydantic v2,
+  i.e. validate, dump to JSON-compatible dicts, then JSONResponse (json.dumps)
+- orjson: the same validation and dicts, rendered by ORJSONResponse
+- adapter: ResponseAdapter.dump_json, the FAST_JSON_RESPONSES path
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import datetime
+import json
+import time
+import tracemalloc
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app import models, schemas
+from app.core.serialization import ResponseAdapter
+
+
+def make_profiles(rows: int) -> list:
+    return [
+        models.Profile(
+            id=i, name=f"Profile {i}", age=20 + i % 40, source="benchmark",
+            telegram_tag=f"@profile{i}", birth_date=datetime.date(1990, 1, 1) + datetime.timedelta(days=i % 3650),
+            photo="/static/avatars/avatar.jpg", opener_id=i % 10, story_id=i % 20,
+            answered_opener=i % 2 == 0, story_discussed=i % 3 == 0,
+            closed_for_meet=i % 5 == 0, closed_for_sex=i % 7 == 0,
+            hobbies=[models.Hobby(id=i * 3 + h, name=f"Hobby {h}", profile_id=i) for h in range(3)],
+            notes=[models.Note(id=i * 2 + n, key=f"key{n}", value=f"value {n}", profile_id=i) for n in range(2)],
+        )
+        for i in range(rows)
+    ]
+
+
+def make_stories(rows: int) -> list:
+    formats = [models.Format(id=1, type="text"), models.Format(id=2, type="audio")]
+    return [
+        models.Story(
+            id=i, title=f"Story {i}", formats=formats,
+            languages=[
+                models.Language(
+                    id=i * 2 + l, code=code, story_id=i,
+                    contents=[
+                        models.Content(id=i * 4 + l * 2, content="Lorem ipsum " * 20, language_id=i * 2 + l, format_id=1),
+                        models.Content(id=i * 4 + l * 2 + 1, content=f"audio/{i}-{code}.mp3", language_id=i * 2 + l, format_id=2),
+                    ],
+                )
+                for l, code in enumerate(("en", "es"))
+            ],
+        )
+        for i in range(rows)
+    ]
+
+
+def measure(render, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = render()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_ms": round(min(timings) * 1000, 1), "peak_alloc_mb": round(peak / 2**20, 1), "bytes": len(body)}
+
+
+def compare(objects, response_type, repeat: int) -> dict:
+    adapter = ResponseAdapter(response_type)
+
+    def response_model():
+        return JSONResponse(adapter.adapter.dump_python(adapter.validate(objects), mode="json")).body
+
+    def orjson():
+        return ORJSONResponse(adapter.adapter.dump_python(adapter.validate(objects), mode="json")).body
+
+    def fast():
+        return adapter.dump_json(objects)
+
+    # Same document either way
+    assert json.loads(response_model()) == json.loads(fast()) == json.loads(orjson())
+    return {name: measure(render, repeat) for name, render in
+            (("response_model", response_model), ("orjson", orjson), ("adapter", fast))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "rows": args.rows,
+        "profiles": compare(make_profiles(args.rows), List[schemas.Profile], args.repeat),
+        "stories": compare(make_stories(args.rows), List[schemas.Story], args.repeat),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
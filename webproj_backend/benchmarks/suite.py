@@ -0,0 +1,427 @@
+"""Benchmark suite covering every dialogs, profiles, stories and analytics route.
+
+Runs the app in-process (ASGI, no network) against a fresh SQLite file or a
+throwaway Postgres database, seeds it, then measures latency percentiles and
+throughput per route. Write routes (creates, nested creates, deletes) get
+their targets created beforehand so only the measured request is timed.
+Results are JSON, tagged with the git commit, e.g.:
+
+    python -m benchmarks.suite --profiles 10000 --stories 1000 -o before.json
+    python -m benchmarks.suite --profiles 10000 --stories 1000 --baseline before.json
+
+The database is written to; never point --database-url at real data.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+import httpx
+
+from benchmarks.load import percentile
+
+API = "/api"
+
+
+class Scenario:
+    # build(i, rng, state, prepared) -> request kwargs for httpx; prepare(client, n, state)
+    # runs before timing and returns one item per request (e.g. an id to delete)
+
+    def __init__(self, name: str, method: str, route: str, build: Callable, prepare: Optional[Callable] = None):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.build = build
+        self.prepare = prepare
+
+
+def seed(engine, args, rng: random.Random) -> dict:
+    # Bulk inserts through the sync engine; not part of any measurement
+    from sqlalchemy import insert, select
+    from app import models
+
+    with engine.begin() as connection:
+        if connection.scalar(select(models.Profile.id).limit(1)) is not None:
+            raise SystemExit("The benchmark database must start empty")
+
+        formats = dict(connection.execute(select(models.Format.type, models.Format.id)).all())
+        for format_type in ("text", "audio"):
+            if format_type not in formats:
+                formats[format_type] = connection.execute(
+                    insert(models.Format).values(type=format_type).returning(models.Format.id)
+                ).scalar_one()
+
+        opener_ids = connection.scalars(
+            insert(models.Opener).returning(models.Opener.id),
+            [{"text": f"Opener {i}", "context": f"context{i % 5}"} for i in range(args.openers)],
+        ).all()
+        connection.execute(insert(models.ContinueOption), [
+            {"text": f"Option {j}", "weight": rng.uniform(0.1, 2.0), "opener_id": opener_id}
+            for opener_id in opener_ids for j in range(args.options)
+        ])
+
+        story_ids = connection.scalars(
+            insert(models.Story).returning(models.Story.id),
+            [{"title": f"Story {i} about the sea and the mountains"} for i in range(args.stories)],
+        ).all()
+        connection.execute(insert(models.story.story_formats), [
+            {"story_id": story_id, "format_id": formats["text"]} for story_id in story_ids
+        ])
+        language_ids = connection.scalars(
+            insert(models.Language).returning(models.Language.id),
+            [{"code": code, "story_id": story_id} for story_id in story_ids for code in ("en", "es")],
+        ).all()
+        connection.execute(insert(models.Content), [
+            {"content": "Once upon a time a sailor climbed a mountain. " * 10,
+             "language_id": language_id, "format_id": formats["text"]}
+            for language_id in language_ids
+        ])
+
+        profile_ids = []
+        for start in range(0, args.profiles, 5000):
+            profile_ids += connection.scalars(
+                insert(models.Profile).returning(models.Profile.id),
+                [
+                    {
+                        "name": f"Profile {i}", "age": 18 + i % 50, "source": rng.choice(("tinder", "bumble", "irl")),
+                        "opener_id": rng.choice(opener_ids) if opener_ids else None,
+                        "story_id": rng.choice(story_ids) if story_ids else None,
+                        "answered_opener": rng.random() < 0.6, "story_discussed": rng.random() < 0.4,
+                        "closed_for_meet": rng.random() < 0.2, "closed_for_sex": rng.random() < 0.1,
+                    }
+                    for i in range(start, min(start + 5000, args.profiles))
+                ],
+            ).all()
+        if profile_ids:
+            connection.execute(insert(models.Hobby), [
+                {"name": f"Hobby {h}", "profile_id": profile_id} for profile_id in profile_ids for h in range(2)
+            ])
+            connection.execute(insert(models.Note), [
+                {"key": "city", "value": "Lisbon", "profile_id": profile_id} for profile_id in profile_ids
+            ])
+
+    return {"opener_ids": opener_ids, "story_ids": story_ids, "profile_ids": profile_ids}
+
+
+def profile_body(i: int) -> dict:
+    return {"name": f"Bench {i}", "age": 30, "source": "bench"}
+
+
+def story_body(i: int) -> dict:
+    return {"title": f"Bench story {i}", "content": "Bench content", "language": "en", "format": "text"}
+
+
+async def create_all(client: httpx.AsyncClient, n: int, method: str, url: Callable, **kwargs) -> list:
+    items = []
+    for i in range(n):
+        response = await client.request(method, url(i), **{key: value(i) for key, value in kwargs.items()})
+        response.raise_for_status()
+        items.append(response.json())
+    return items
+
+
+async def prepare_profiles(client, n, state):
+    return await create_all(client, n, "POST", lambda i: f"{API}/profiles/", json=profile_body)
+
+
+async def prepare_stories(client, n, state):
+    return await create_all(client, n, "POST", lambda i: f"{API}/stories/", json=story_body)
+
+
+async def prepare_openers(client, n, state):
+    return await create_all(
+        client, n, "POST", lambda i: f"{API}/openers/", json=lambda i: {"text": f"Bench {i}", "context": "bench"}
+    )
+
+
+async def prepare_hobbies(client, n, state):
+    ids = state["profile_ids"]
+    return await create_all(
+        client, n, "POST", lambda i: f"{API}/profiles/{ids[i % len(ids)]}/hobbies", json=lambda i: {"name": "Chess"}
+    )
+
+
+async def prepare_notes(client, n, state):
+    ids = state["profile_ids"]
+    return await create_all(
+        client, n, "POST", lambda i: f"{API}/profiles/{ids[i % len(ids)]}/notes",
+        json=lambda i: {"key": "bench", "value": str(i)}
+    )
+
+
+async def prepare_options(client, n, state):
+    ids = state["opener_ids"]
+    return await create_all(
+        client, n, "POST", lambda i: f"{API}/openers/{ids[i % len(ids)]}/options",
+        json=lambda i: {"text": "Bench option", "weight": 1.0}
+    )
+
+
+async def prepare_languages(client, n, state):
+    # Fresh stories with a second language each, so deleting it never deletes the story
+    stories = await prepare_stories(client, n, state)
+    for story in stories:
+        response = await client.post(
+            f"{API}/stories/{story['id']}/languages", data={"language": "fr", "content": "Bonjour", "format": "text"}
+        )
+        response.raise_for_status()
+    return stories
+
+
+def pick(rng, ids):
+    return rng.choice(ids)
+
+
+def scenarios(args) -> List[Scenario]:
+    text_format = lambda state: state["format_ids"]["text"]
+    return [
+        # Openers
+        Scenario("openers.list", "GET", "/openers/", lambda i, rng, s, p: {"url": f"{API}/openers/"}),
+        Scenario("openers.detail", "GET", "/openers/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/{pick(rng, s['opener_ids'])}"}),
+        Scenario("openers.sample", "GET", "/openers/sample",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/sample", "params": {"context": "context1", "n": 10}}),
+        Scenario("openers.options_sample", "GET", "/openers/{id}/options/sample",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/{pick(rng, s['opener_ids'])}/options/sample",
+                                       "params": {"n": 10}}),
+        Scenario("openers.create", "POST", "/openers/",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/", "json": {"text": f"New {i}", "context": "bench"}}),
+        Scenario("openers.update", "PUT", "/openers/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/{p['id']}", "json": {"text": "Updated", "context": "bench"}},
+                 prepare_openers),
+        Scenario("openers.create_option", "POST", "/openers/{id}/options",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/{pick(rng, s['opener_ids'])}/options",
+                                       "json": {"text": "Option", "weight": 1.0}}),
+        Scenario("openers.delete_option", "DELETE", "/openers/{id}/options/{option_id}",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/{p['opener_id']}/options/{p['id']}"},
+                 prepare_options),
+        Scenario("openers.delete", "DELETE", "/openers/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/openers/{p['id']}"}, prepare_openers),
+
+        # Profiles
+        Scenario("profiles.list", "GET", "/profiles/",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/", "params": {"limit": args.page_size}}),
+        Scenario("profiles.list_filtered", "GET", "/profiles/",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/",
+                                       "params": {"limit": args.page_size, "source": "tinder", "answered_opener": True}}),
+        Scenario("profiles.list_sparse", "GET", "/profiles/",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/",
+                                       "params": {"limit": args.page_size, "fields": "name,age,photo_url"}}),
+        Scenario("profiles.detail", "GET", "/profiles/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{pick(rng, s['profile_ids'])}"}),
+        Scenario("profiles.detail_expanded", "GET", "/profiles/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{pick(rng, s['profile_ids'])}",
+                                       "params": {"expand": "opener,story"}}),
+        Scenario("profiles.create", "POST", "/profiles/",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/", "json": profile_body(i)}),
+        Scenario("profiles.update", "PUT", "/profiles/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{p['id']}", "json": {"answered_opener": True}},
+                 prepare_profiles),
+        Scenario("profiles.update_checkpoints", "PATCH", "/profiles/checkpoints",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/checkpoints",
+                                       "json": {"ids": rng.sample(s["profile_ids"], min(100, len(s["profile_ids"]))),
+                                                "checkpoints": {"story_discussed": i % 2 == 0}}}),
+        Scenario("profiles.create_hobby", "POST", "/profiles/{id}/hobbies",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{pick(rng, s['profile_ids'])}/hobbies",
+                                       "json": {"name": "Climbing"}}),
+        Scenario("profiles.create_note", "POST", "/profiles/{id}/notes",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{pick(rng, s['profile_ids'])}/notes",
+                                       "json": {"key": "bench", "value": str(i)}}),
+        Scenario("profiles.update_note", "PUT", "/profiles/{id}/notes/{note_id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{p['profile_id']}/notes/{p['id']}",
+                                       "json": {"key": "bench", "value": "updated"}},
+                 prepare_notes),
+        Scenario("profiles.delete_hobby", "DELETE", "/profiles/{id}/hobbies/{hobby_id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{p['profile_id']}/hobbies/{p['id']}"},
+                 prepare_hobbies),
+        Scenario("profiles.delete_note", "DELETE", "/profiles/{id}/notes/{note_id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{p['profile_id']}/notes/{p['id']}"},
+                 prepare_notes),
+        Scenario("profiles.delete", "DELETE", "/profiles/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/{p['id']}"}, prepare_profiles),
+        Scenario("profiles.import", "POST", "/profiles/import",
+                 lambda i, rng, s, p: {"url": f"{API}/profiles/import", "files": {"file": (
+                     "profiles.ndjson",
+                     "".join(json.dumps(profile_body(i * 100 + j)) + "\n" for j in range(100)).encode(),
+                     "application/x-ndjson",
+                 )}}),
+
+        # Stories
+        Scenario("stories.list", "GET", "/stories/", lambda i, rng, s, p: {"url": f"{API}/stories/"}),
+        Scenario("stories.list_sparse", "GET", "/stories/",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/", "params": {"fields": "title,languages.code"}}),
+        Scenario("stories.detail", "GET", "/stories/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/{pick(rng, s['story_ids'])}"}),
+        Scenario("stories.search", "GET", "/stories/search",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/search", "params": {"q": rng.choice(("sailor", "mountain sea"))}}),
+        Scenario("stories.languages", "GET", "/stories/languages", lambda i, rng, s, p: {"url": f"{API}/stories/languages"}),
+        Scenario("stories.create", "POST", "/stories/",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/", "json": story_body(i)}),
+        Scenario("stories.bulk", "POST", "/stories/bulk",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/bulk", "json": [
+                     {"title": f"Bulk {i}-{j}", "languages": [{"code": "en", "contents": {"text": "Bulk content"}}]}
+                     for j in range(50)
+                 ]}),
+        Scenario("stories.update", "PUT", "/stories/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/{p['id']}", "json": {"title": "Renamed"}},
+                 prepare_stories),
+        Scenario("stories.add_language", "POST", "/stories/{id}/languages",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/{p['id']}/languages",
+                                       "data": {"language": "de", "content": "Hallo", "format": "text"}},
+                 prepare_stories),
+        Scenario("stories.delete_language_format", "DELETE", "/stories/{id}/languages/{code}/formats/{format_id}",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/{p['id']}/languages/fr/formats/{text_format(s)}"},
+                 prepare_languages),
+        Scenario("stories.delete_language", "DELETE", "/stories/{id}/languages/{code}",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/{p['id']}/languages/fr"}, prepare_languages),
+        Scenario("stories.delete", "DELETE", "/stories/{id}",
+                 lambda i, rng, s, p: {"url": f"{API}/stories/{p['id']}"}, prepare_stories),
+
+        # Analytics
+        Scenario("analytics.funnel", "GET", "/analytics/funnel",
+                 lambda i, rng, s, p: {"url": f"{API}/analytics/funnel", "params": {"group_by": "source,opener_id"}}),
+        Scenario("analytics.funnel_live", "GET", "/analytics/funnel",
+                 lambda i, rng, s, p: {"url": f"{API}/analytics/funnel",
+                                       "params": {"group_by": "source", "live": True}}),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, state: dict, args) -> dict:
+    rng = random.Random(args.seed)
+    n = args.requests
+    prepared = await scenario.prepare(client, n, state) if scenario.prepare else [None] * n
+    requests = [scenario.build(i, rng, state, prepared[i]) for i in range(n)]
+
+    latencies = []
+    errors = 0
+    pending = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for kwargs in pending:
+            start = time.perf_counter()
+            response = await client.request(scenario.method, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "name": scenario.name,
+        "method": scenario.method,
+        "route": scenario.route,
+        "requests": n,
+        "errors": errors,
+        "requests_per_second": round(n / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run(args) -> dict:
+    # Settings are read at import time, so the app is imported only after the
+    # environment points it at the benchmark database
+    from sqlalchemy import select
+    from app import models
+    from app.database import engine
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        state = seed(engine, args, random.Random(args.seed))
+        with engine.connect() as connection:
+            state["format_ids"] = dict(connection.execute(select(models.Format.type, models.Format.id)).all())
+
+        transport = httpx.ASGITransport(app=app)
+        results = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120.0) as client:
+            for scenario in scenarios(args):
+                if args.only and not any(scenario.name.startswith(prefix) for prefix in args.only):
+                    continue
+                results.append(await run_scenario(client, scenario, state, args))
+                print(json.dumps(results[-1]), file=sys.stderr)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "volumes": {"profiles": args.profiles, "stories": args.stories, "openers": args.openers},
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[dict]:
+    # Routes whose p95 grew by more than threshold (0.2 = 20%) since the baseline run
+    before = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        previous = before.get(result["name"])
+        if previous and previous["p95_ms"] > 0:
+            change = result["p95_ms"] / previous["p95_ms"] - 1
+            if change > threshold:
+                regressions.append({"name": result["name"], "p95_ms": result["p95_ms"],
+                                    "baseline_p95_ms": previous["p95_ms"], "change": round(change, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Throwaway database; defaults to a temporary SQLite file")
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--stories", type=int, default=500)
+    parser.add_argument("--openers", type=int, default=50)
+    parser.add_argument("--options", type=int, default=5, help="Continue options per opener")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("-n", "--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", action="append", help="Run routes whose name starts with this; may be repeated")
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/benchmark.db"
+        os.environ["MEDIA_DIR"] = os.path.join(workdir, "media")
+        os.environ["MIGRATE_ON_STARTUP"] = "true"
+        report = asyncio.run(run(args))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            report["regressions"] = compare(report, json.load(file), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
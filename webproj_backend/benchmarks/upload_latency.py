@@ -0,0 +1,88 @@
+"""Latency of a read endpoint while large avatar uploads run concurrently.
+
+Measures GET latency alone, then again while --uploaders clients keep
+uploading --size-mb files to /api/profiles/{id}/avatar, e.g.:
+
+    python -m benchmarks.upload_latency --url http://localhost:8000 --profile-id 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from benchmarks.load import percentile
+
+
+async def probe(client: httpx.AsyncClient, path: str, duration: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def upload_loop(client: httpx.AsyncClient, profile_id: int, payload: bytes, stop: asyncio.Event) -> int:
+    uploads = 0
+    while not stop.is_set():
+        files = {"file": ("load.jpg", payload, "image/jpeg")}
+        await client.post(f"/api/profiles/{profile_id}/avatar", files=files)
+        uploads += 1
+    return uploads
+
+
+def summary(latencies: list) -> dict:
+    return {
+        "samples": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run(args) -> dict:
+    # Random bytes: the size limit and the disk write path are what's measured,
+    # the background resize just logs a decode failure
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120.0) as client:
+        idle = await probe(client, args.path, args.duration)
+
+        stop = asyncio.Event()
+        uploaders = [
+            asyncio.create_task(upload_loop(client, args.profile_id, payload, stop))
+            for _ in range(args.uploaders)
+        ]
+        loaded = await probe(client, args.path, args.duration)
+        stop.set()
+        uploads = sum(await asyncio.gather(*uploaders))
+
+    return {
+        "path": args.path,
+        "upload_mb": args.size_mb,
+        "uploaders": args.uploaders,
+        "uploads_completed": uploads,
+        "idle": summary(idle),
+        "during_uploads": summary(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/openers/")
+    parser.add_argument("--profile-id", type=int, required=True)
+    parser.add_argument("--uploaders", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# Settings are read when app.core.config is imported, so point the app at a
+# scratch database first. TEST_DATABASE_URL runs the suite against a throwaway
+# Postgres database instead; never point it at real data.
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="webproj-tests-"))
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{SCRATCH_DIR / 'test.db'}")
+os.environ["MEDIA_DIR"] = str(SCRATCH_DIR / "media")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import async_engine
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    # One app (and migrated database) for the whole run; tests keep their rows
+    # apart with a unique profile source or story title
+    with TestClient(app) as client:
+        yield client
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+@pytest.fixture
+def statements():
+    # Counts statements the request handlers send through the async engine
+    counter = StatementCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+def import_profiles(client, source: str, count: int, hobbies: int = 2, notes: int = 1) -> int:
+    rows = "".join(
+        json.dumps({
+            "name": f"{source} {i}",
+            "age": 20 + i % 30,
+            "source": source,
+            "hobbies": [{"name": f"Hobby {h}"} for h in range(hobbies)],
+            "notes": [{"key": f"key {n}", "value": "value"} for n in range(notes)],
+        }) + "\n"
+        for i in range(count)
+    )
+    response = client.post(
+        "/api/profiles/import",
+        params={"format": "ndjson"},
+        files={"file": ("profiles.ndjson", rows.encode(), "application/x-ndjson")},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == count
+    return count
@@ -0,0 +1,63 @@
+import pytest
+
+GROUPINGS = ["", "source", "opener_id", "source,opener_id,story_id"]
+
+def funnel(client, group_by: str, **params) -> list:
+    response = client.get("/api/analytics/funnel", params={"group_by": group_by, **params})
+    assert response.status_code == 200, response.text
+    return sorted(response.json(), key=lambda row: sorted((key, str(value)) for key, value in row.items()))
+
+def assert_summary_matches_live(client):
+    for group_by in GROUPINGS:
+        assert funnel(client, group_by) == funnel(client, group_by, live="true"), group_by
+
+@pytest.fixture(scope="module")
+def funnel_profiles(client):
+    openers = [client.post("/api/openers/", json={"text": f"Funnel {i}", "context": "funnel"}).json() for i in range(2)]
+    story = client.post(
+        "/api/stories/", json={"title": "Funnel", "content": "Once", "language": "en", "format": "text"}
+    ).json()
+
+    profiles = []
+    for i in range(12):
+        # Every prefix of the stages, plus rows that skip one (they only count up to the gap)
+        flags = [i % 5 > 0, i % 5 > 1, i % 5 > 2 or i % 4 == 3, i % 5 > 3]
+        profiles.append(client.post("/api/profiles/", json={
+            "name": f"Funnel {i}",
+            "age": 20 + i,
+            "source": f"funnel-{i % 2}",
+            "opener_id": openers[i % 3 % 2]["id"] if i % 3 else None,
+            "story_id": story["id"] if i % 2 else None,
+            **dict(zip(("answered_opener", "story_discussed", "closed_for_meet", "closed_for_sex"), flags)),
+        }).json())
+    return profiles
+
+def test_funnel_counts(client, funnel_profiles):
+    rows = funnel(client, "", source="funnel-0")
+    expected = [p for p in funnel_profiles if p["source"] == "funnel-0"]
+    assert rows[0]["total"] == len(expected)
+    assert rows[0]["answered_opener"] == sum(p["answered_opener"] for p in expected)
+    assert rows[0]["closed_for_sex"] == sum(
+        p["answered_opener"] and p["story_discussed"] and p["closed_for_meet"] and p["closed_for_sex"]
+        for p in expected
+    )
+    assert_summary_matches_live(client)
+
+def test_funnel_follows_writes(client, funnel_profiles):
+    first, second, third = funnel_profiles[:3]
+
+    client.put(f"/api/profiles/{first['id']}", json={"source": "funnel-1", "answered_opener": True})
+    assert_summary_matches_live(client)
+
+    # Bulk update: one statement over many rows
+    response = client.patch(
+        "/api/profiles/checkpoints",
+        params={"source": "funnel-1"},
+        json={"checkpoints": {"story_discussed": True}},
+    )
+    assert response.json()["updated"] > 0
+    assert_summary_matches_live(client)
+
+    client.delete(f"/api/profiles/{second['id']}")
+    client.delete(f"/api/profiles/{third['id']}")
+    assert_summary_matches_live(client)
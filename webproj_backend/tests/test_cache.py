@@ -0,0 +1,38 @@
+import asyncio
+from app.core.cache import Cache, MemoryCacheBackend
+from app.core.etag import cache_variant
+
+def test_counters_are_bounded_and_never_go_back():
+    backend = MemoryCacheBackend(max_entries=3)
+    cache = Cache("bounded", backend)
+
+    async def scenario():
+        await cache.invalidate("a", "a")
+        assert await cache.generation("a") == 2
+
+        # Invalidating many other keys pushes "a" out of the counters
+        await cache.invalidate(*(f"key {i}" for i in range(100)))
+        assert len(backend._counters) <= 3
+        assert "bounded:a:generation" not in backend._counters
+        assert await cache.generation("a") >= 2
+
+        await cache.invalidate("a")
+        assert await cache.generation("a") > 2
+
+    asyncio.run(scenario())
+
+def test_variant_ignores_unknown_and_reordered_params(client):
+    from app.api.endpoints.stories import story_cache
+
+    story = client.post(
+        "/api/stories/", json={"title": "Variant", "content": "Once", "language": "en", "format": "text"}
+    ).json()
+    url = f"/api/stories/{story['id']}"
+
+    etag = client.get(url, params={"fields": "id,title"}).headers["etag"]
+    misses = story_cache.misses
+    for params in ({"fields": "title,id"}, {"fields": "id,title", "cachebust": "1"}, {"fields": ["title", "id"]}):
+        assert client.get(url, params=params).headers["etag"] == etag
+    assert story_cache.misses == misses
+
+    assert cache_variant(None) != cache_variant({"id": None})
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import text
+from app.database import engine
+
+# (lookup the handlers issue, index that must serve it); parameter values are
+# placeholders, only the plan matters
+LOOKUPS = [
+    ("SELECT * FROM hobbies WHERE profile_id IN (1, 2, 3)", "ix_hobbies_profile_id"),
+    ("SELECT * FROM notes WHERE profile_id IN (1, 2, 3)", "ix_notes_profile_id"),
+    ("SELECT * FROM continue_options WHERE opener_id IN (1, 2, 3)", "ix_continue_options_opener_id"),
+    ("SELECT * FROM languages WHERE story_id IN (1, 2, 3)", "uq_languages_story_id_code"),
+    ("SELECT * FROM languages WHERE story_id = 1 AND code = 'en'", "uq_languages_story_id_code"),
+    ("SELECT * FROM contents WHERE language_id IN (1, 2, 3)", "uq_contents_language_id_format_id"),
+    ("SELECT * FROM contents WHERE language_id = 1 AND format_id = 1", "uq_contents_language_id_format_id"),
+    ("SELECT * FROM formats WHERE type = 'text'", "ix_formats_type"),
+]
+
+def postgres_indexes(connection, statement: str) -> set:
+    # Small tables make a seq scan the cheapest plan; rule that out to see
+    # whether an index can serve the lookup at all
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    nodes, indexes = [plan[0]["Plan"]], set()
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return indexes
+
+def sqlite_indexes(connection, statement: str) -> set:
+    # e.g. "SEARCH hobbies USING INDEX ix_hobbies_profile_id (profile_id=?)"
+    details = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+    return {
+        detail.split(" INDEX ", 1)[1].split(" ", 1)[0]
+        for detail in details
+        if detail.startswith("SEARCH ") and " INDEX " in detail
+    }
+
+@pytest.mark.parametrize("statement, index", LOOKUPS)
+def test_lookup_uses_index(client, statement, index):
+    explain = {"postgresql": postgres_indexes, "sqlite": sqlite_indexes}.get(engine.dialect.name)
+    if explain is None:
+        pytest.skip(f"No EXPLAIN check for {engine.dialect.name}")
+
+    with engine.connect() as connection, connection.begin():
+        assert index in explain(connection, statement)
@@ -0,0 +1,20 @@
+from app.core.metrics import route_metrics
+
+def test_routes_are_labelled_with_their_full_template(client):
+    route_metrics.reset()
+    client.get("/api/profiles/")
+    client.get("/api/stories/")
+    client.get("/api/profiles/export", params={"source": "metrics"})
+    client.get("/api/profiles/0")
+    client.get("/api/stories/0/languages/en/audio")
+    client.get("/no-such-page")
+
+    routes = {route for _, route, _ in route_metrics.requests}
+    assert routes == {
+        "/api/profiles/",
+        "/api/stories/",
+        "/api/profiles/export",
+        "/api/profiles/{profile_id}",
+        "/api/stories/{story_id}/languages/{language_code}/audio",
+        "<unmatched>",
+    }
@@ -0,0 +1,176 @@
+import asyncio
+import io
+import pytest
+from app.main import app
+from tests.conftest import import_profiles
+
+@pytest.mark.parametrize("expand", [None, "opener,story"])
+def test_list_statement_count_does_not_grow_with_profiles(client, statements, expand):
+    # Hobbies and notes are eager-loaded per query, not per profile
+    counts = []
+    for size in (1, 20):
+        source = f"statements-{expand}-{size}"
+        import_profiles(client, source, size)
+
+        params = {"source": source}
+        if expand:
+            params["expand"] = expand
+        statements.count = 0
+        response = client.get("/api/profiles/", params=params)
+
+        assert response.status_code == 200
+        assert len(response.json()) == size
+        assert all(len(profile["hobbies"]) == 2 for profile in response.json())
+        counts.append(statements.count)
+
+    assert counts[0] == counts[1]
+
+def test_detail_statement_count(client, statements):
+    import_profiles(client, "statements-detail", 1, hobbies=5, notes=5)
+    profile_id = client.get("/api/profiles/", params={"source": "statements-detail"}).json()[0]["id"]
+
+    statements.count = 0
+    response = client.get(f"/api/profiles/{profile_id}", params={"expand": "opener"})
+
+    assert response.status_code == 200
+    assert len(response.json()["notes"]) == 5
+    # Profile (with opener joined), hobbies, notes, continue options
+    assert statements.count <= 4
+
+def test_opener_and_story_only_with_expand(client):
+    opener = client.post("/api/openers/", json={"text": "Hi", "context": "expand-test"}).json()
+    profile = client.post(
+        "/api/profiles/", json={"name": "Expand", "age": 30, "source": "expand-test", "opener_id": opener["id"]}
+    ).json()
+    url = f"/api/profiles/{profile['id']}"
+
+    plain = client.get(url).json()
+    assert plain["opener_id"] == opener["id"] and plain["opener"] is None
+
+    expanded = client.get(url, params={"expand": "opener"}).json()
+    assert expanded["opener"]["id"] == opener["id"] and expanded["story"] is None
+
+def test_list_pages_only_when_asked(client):
+    import_profiles(client, "paging", 150, hobbies=0, notes=0)
+
+    # No limit or cursor: every profile, as before pagination existed
+    response = client.get("/api/profiles/", params={"source": "paging"})
+    assert len(response.json()) == 150
+    assert "x-next-cursor" not in response.headers
+
+    first = client.get("/api/profiles/", params={"source": "paging", "limit": 100})
+    assert len(first.json()) == 100
+    cursor = first.headers["x-next-cursor"]
+
+    rest = client.get("/api/profiles/", params={"source": "paging", "cursor": cursor})
+    assert len(rest.json()) == 50
+    assert "x-next-cursor" not in rest.headers
+    ids = [profile["id"] for profile in first.json() + rest.json()]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 150
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_streams_more_than_one_batch(client, format):
+    from app.api.endpoints.profiles import EXPORT_BATCH_SIZE
+
+    source = f"export-{format}"
+    count = import_profiles(client, source, EXPORT_BATCH_SIZE * 2 + 50)
+
+    response = client.get("/api/profiles/export", params={"format": format, "source": source})
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    if format == "csv":
+        assert lines[0].startswith("id,name")
+        lines = lines[1:]
+    assert len(lines) == count
+
+def avatar_png(color) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_replaced_avatar_files_are_removed(client):
+    from app.core.media import avatar_files
+
+    profile = client.post("/api/profiles/", json={"name": "Avatar", "age": 30, "source": "avatars"}).json()
+    photos = []
+    for color in ("red", "blue"):
+        response = client.post(
+            f"/api/profiles/{profile['id']}/avatar",
+            files={"file": ("avatar.png", avatar_png(color), "image/png")},
+        )
+        assert response.status_code == 200
+        # The test client runs the resize task before returning
+        photos.append(client.get(f"/api/profiles/{profile['id']}").json()["photo"])
+
+    first, second = (avatar_files(photo) for photo in photos)
+    assert len(first) == len(second) == 3
+    assert not any(path.exists() for path in first)
+    assert all(path.exists() for path in second)
+
+    client.delete(f"/api/profiles/{profile['id']}")
+    assert not any(path.exists() for path in second)
+
+def test_oversized_avatar_is_refused_before_the_body_is_read(client):
+    from app.core.config import settings
+
+    profile = client.post("/api/profiles/", json={"name": "Big", "age": 30, "source": "avatars"}).json()
+    url = f"/api/profiles/{profile['id']}/avatar"
+    boundary = "limit-test"
+    head = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.png"\r\n'
+        f"Content-Type: image/png\r\n\r\n"
+    ).encode()
+    chunk = b"\0" * (1024 * 1024)
+    chunks = settings.MAX_AVATAR_UPLOAD_BYTES // len(chunk) + 2
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+    # Declared length over the limit
+    response = client.post(url, content=head + chunk * chunks, headers=headers)
+    assert response.status_code == 413
+
+    # Chunked (no Content-Length): refused once the limit is passed. Driven
+    # through ASGI directly because the test client buffers the whole body.
+    total = chunks * 4
+    pulled = 0
+
+    async def receive():
+        nonlocal pulled
+        pulled += 1
+        return {"type": "http.request", "body": head if pulled == 1 else chunk, "more_body": pulled < total}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": url, "raw_path": url.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", headers["Content-Type"].encode())],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+    asyncio.run(app(scope, receive, send))
+
+    assert sent[0]["status"] == 413
+    assert pulled < total
+
+def test_cached_profile_drops_deleted_story_and_opener(client):
+    opener = client.post("/api/openers/", json={"text": "Hi", "context": "cache-test"}).json()
+    story = client.post(
+        "/api/stories/", json={"title": "Cache test", "content": "Once", "language": "en", "format": "text"}
+    ).json()
+    profile = client.post("/api/profiles/", json={
+        "name": "Linked", "age": 30, "source": "cache-test", "opener_id": opener["id"], "story_id": story["id"],
+    }).json()
+
+    url = f"/api/profiles/{profile['id']}"
+    assert client.get(url).json()["story_id"] == story["id"]
+
+    client.delete(f"/api/stories/{story['id']}")
+    client.delete(f"/api/openers/{opener['id']}")
+
+    cached = client.get(url).json()
+    assert cached["story_id"] is None and cached["opener_id"] is None
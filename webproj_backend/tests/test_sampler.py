@@ -0,0 +1,27 @@
+import asyncio
+from app.core.cache import Cache, MemoryCacheBackend
+from app.core.sampler import AliasTableCache
+
+def test_invalidation_reaches_every_worker():
+    # Two workers' table caches sharing one backend, as with CACHE_BACKEND=redis
+    backend = MemoryCacheBackend()
+    first = AliasTableCache(Cache("sampler", backend))
+    second = AliasTableCache(Cache("sampler", backend))
+    weights = {"a": 1.0}
+
+    async def build():
+        return list(weights), list(weights.values())
+
+    async def scenario():
+        for worker in (first, second):
+            assert (await worker.get(("options", 1), build)).items == ["a"]
+
+        # A write handled by the first worker: the second must not keep its table
+        weights.clear()
+        weights["b"] = 1.0
+        await first.invalidate(("options", 1))
+
+        assert (await second.get(("options", 1), build)).items == ["b"]
+        assert (await first.get(("options", 1), build)).items == ["b"]
+
+    asyncio.run(scenario())
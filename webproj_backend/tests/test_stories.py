@@ -0,0 +1,67 @@
+import pytest
+
+def create_story(client, title: str) -> dict:
+    response = client.post(
+        "/api/stories/", json={"title": title, "content": "Once", "language": "en", "format": "text"}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+@pytest.mark.parametrize("path", ["/api/stories/{id}", "/api/stories/"])
+def test_etag_follows_story_version(client, statements, path):
+    story = create_story(client, f"ETag {path}")
+    url = path.format(id=story["id"])
+
+    first = client.get(url)
+    etag = first.headers["etag"]
+
+    # An unchanged story is revalidated with the version check alone
+    statements.count = 0
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert statements.count == 1
+
+    client.put(f"/api/stories/{story['id']}", json={"title": f"ETag {path} renamed"})
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert f"ETag {path} renamed" in response.text
+
+def test_fields_load_only_the_selection(client):
+    story = create_story(client, "Fields")
+    url = f"/api/stories/{story['id']}"
+
+    assert client.get(url, params={"fields": "title"}).json() == {"id": story["id"], "title": "Fields"}
+
+    nested = client.get(url, params={"fields": "title,languages.code"}).json()
+    language_id = story["languages"][0]["id"]
+    assert nested == {"id": story["id"], "title": "Fields", "languages": [{"id": language_id, "code": "en"}]}
+
+def test_language_delete_bumps_the_version(client):
+    story = create_story(client, "Languages")
+    url = f"/api/stories/{story['id']}"
+    response = client.post(f"{url}/languages", data={"language": "de", "content": "Einst", "format": "text"})
+    assert response.status_code == 200
+
+    etag = client.get(url).headers["etag"]
+    assert client.delete(f"{url}/languages/de").json() == {"message": "Language deleted successfully"}
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [language["code"] for language in response.json()["languages"]] == ["en"]
+
+    assert client.delete(f"{url}/languages/en").json() == {"message": "Story deleted as it had no languages left"}
+    assert client.get(url).status_code == 404
+
+def test_list_etag_changes_when_an_id_is_reused(client):
+    # SQLite without AUTOINCREMENT hands the highest id out again once it is deleted
+    first = create_story(client, "Reused id")
+    etag = client.get("/api/stories/").headers["etag"]
+
+    client.delete(f"/api/stories/{first['id']}")
+    second = create_story(client, "Reused id, second")
+
+    response = client.get("/api/stories/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Reused id, second" in response.text
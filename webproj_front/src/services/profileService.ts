@@ -9,6 +9,7 @@ export interface Profile {
   birth_date?: string
   photo: string
   photo_url: string
+  photo_urls: Record<'thumb' | 'card' | 'full', string>
   opener_id?: string
   story_id?: string
   answered_opener: boolean
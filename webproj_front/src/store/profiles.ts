@@ -44,8 +44,16 @@ export const useProfileStore = defineStore('profiles', {
     async fetchProfiles() {
       this.loading = true
       try {
-        const response = await api.get('/profiles')
-        this.profiles = response.data
+        const profiles: Profile[] = []
+        let cursor: string | undefined
+        do {
+          const response = await api.get('/profiles', {
+            params: cursor ? { cursor } : {}
+          })
+          profiles.push(...response.data)
+          cursor = response.headers['x-next-cursor']
+        } while (cursor)
+        this.profiles = profiles
       } catch (err) {
         this.error = 'Failed to fetch profiles'
         throw err